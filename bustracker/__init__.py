@@ -1,24 +1,116 @@
 import os
+import time
 
-from datetime import datetime
+from datetime import date, datetime
 
 from dotenv import load_dotenv
-from flask import Flask, g, redirect, render_template, session, url_for
+from flask import (
+    Flask,
+    g,
+    Response,
+    jsonify,
+    make_response,
+    redirect,
+    render_template,
+    request,
+    session,
+    url_for,
+)
 
+from bustracker.assets import init_assets
 from bustracker.auth import init_oauth, oauth
 from bustracker.auth_service import (
     MSG_NO_SCHOOLS,
     get_user_allowed_schools,
     sync_user_from_google_claims,
+    user_display_name_cache,
+    user_has_school_access,
+)
+from bustracker.bus_run_service import (
+    find_or_create_bus_run,
+    get_bus_run_ref,
+    get_run_type_id,
+    load_bus_run_edit_view,
+    load_bus_run_view,
+    load_tile_changes,
 )
 from bustracker.auth_utils import login_required
+from bustracker.cache import (
+    MEMBERSHIP_VERSION,
+    REFERENCE_DATA_VERSION,
+    get_cache_version,
+)
+from bustracker.change_feed import ensure_change_feed
 from bustracker.config import DevConfig, ProdConfig
-from bustracker.db import get_session, init_engine, ping_db
+from bustracker.dashboard_service import load_dashboard
+from bustracker.db import (
+    LazySession,
+    get_engines,
+    get_pool_stats,
+    has_replicas,
+    init_engine,
+    primary_db,
+)
+from bustracker.health import ReadinessProbe
+from bustracker.live import TooManyStreams, broadcaster, stream_run_events
+from bustracker.metrics import (
+    MetricsRegistry,
+    finish_request_stats,
+    install_engine_hooks,
+    start_request_stats,
+)
 from bustracker.models.user import User
-from bustracker.ui_demo_data import (
-    get_demo_bus_run_edit_view,
-    get_demo_bus_run_view,
-    get_demo_home_options,
+from bustracker.page_cache import (
+    not_modified,
+    page_etag,
+    set_page_etag,
+    template_fingerprint,
+)
+from bustracker.query_guard import (
+    check_budget,
+    finish_tracking,
+    get_tracker,
+    install_query_guard,
+    query_budget,
+    start_tracking,
+)
+from bustracker.reference_data import get_bus_options, get_home_options
+from bustracker.status_event_service import (
+    MAX_STUDENT_COUNT,
+    InvalidStatusEvents,
+    StatusTypesNotConfigured,
+    apply_status_events,
+    get_bus_run_history,
+    mark_buses_rolling,
+    parse_status_events,
+)
+
+
+MSG_BUS_RUN_NOT_FOUND = (
+    "That bus run doesn't exist or has been deleted."
+)
+
+MSG_BUS_RUN_NO_ACCESS = (
+    "You don't have access to the school for this bus run. Please contact "
+    "your administrator."
+)
+
+MSG_BUS_RUN_BAD_FORM = (
+    "Please choose a school, a date and a run type."
+)
+
+MSG_BUS_RUN_NO_BUSES = (
+    "None of the selected buses run for that school and run type. Please "
+    "choose at least one bus."
+)
+
+MSG_BUS_RUN_DELETED = (
+    "The bus run for that school, date and run type was deleted. Please "
+    "contact your administrator to restore it."
+)
+
+MSG_STATUS_TYPES_MISSING = (
+    "Bus statuses haven't been set up yet. Please contact your administrator."
 )
 
 
@@ -51,6 +143,23 @@ def _get_current_user(db, user_id):
     return db.get(User, user_id)
 
 
+def _get_current_user_display_name(db, user_id):
+    if user_id is None:
+        return None
+
+    display_name = user_display_name_cache.get(user_id)
+    if display_name is not None:
+        return display_name
+
+    user = _get_current_user(db, user_id)
+    if user is None:
+        return None
+
+    display_name = _build_compact_user_display_name(user)
+    user_display_name_cache.set(user_id, display_name)
+    return display_name
+
+
 def _format_date_mmddyyyy(val):
     if val is None:
         return ''
@@ -80,23 +189,128 @@ def create_app():
     
     app.jinja_env.filters['mmddyyyy'] = _format_date_mmddyyyy
 
+    # Part of every page ETag, see page_cache
+    app.config['PAGE_ETAG_SALT'] = template_fingerprint(
+        os.path.join(app.root_path, app.template_folder)
+    )
+
     env = os.getenv('FLASK_ENV', 'development').lower()
     cfg = ProdConfig() if env == 'production' else DevConfig()
 
+    # Fingerprinted static files, reloaded on change outside production
+    assets = init_assets(app, reload=(env != 'production'))
+
+    def page_version():
+        # Pages embed hashed asset URLs, so new assets mean new pages
+        return '%s-%s' % (app.config['PAGE_ETAG_SALT'], assets.get_version())
+
     app.config['SECRET_KEY'] = cfg.SECRET_KEY
     app.config['APP_BASE_URL'] = cfg.APP_BASE_URL
     app.config['GOOGLE_OAUTH_CLIENT_ID'] = cfg.GOOGLE_OAUTH_CLIENT_ID
     app.config['GOOGLE_OAUTH_CLIENT_SECRET'] = cfg.GOOGLE_OAUTH_CLIENT_SECRET
     app.config['GOOGLE_OAUTH_REDIRECT_URI'] = cfg.GOOGLE_OAUTH_REDIRECT_URI
 
-    init_engine(cfg.SQLALCHEMY_DATABASE_URI)
+    app.config['DB_READ_YOUR_WRITES_SECONDS'] = cfg.DB_READ_YOUR_WRITES_SECONDS
+    app.config['CHANGE_FEED_POLL_SECONDS'] = cfg.CHANGE_FEED_POLL_SECONDS
+
+    broadcaster.max_subscribers = cfg.SSE_MAX_STREAMS_PER_WORKER
+
+    init_engine(
+        cfg.SQLALCHEMY_DATABASE_URI,
+        cfg.SQLALCHEMY_REPLICA_URIS,
+        cfg.DB_POOL_SETTINGS,
+    )
+
+    app.config['QUERY_GUARD_MODE'] = cfg.QUERY_GUARD_MODE
+    app.config['QUERY_GUARD_REPEAT_LIMIT'] = cfg.QUERY_GUARD_REPEAT_LIMIT
+
+    metrics = MetricsRegistry()
+    for _name, engine in get_engines():
+        install_engine_hooks(engine)
+        install_query_guard(engine)
+
+    readiness_probe = ReadinessProbe(cfg.HEALTH_DB_PROBE_INTERVAL_SECONDS)
 
     # OAuth (Google OIDC)
     init_oauth(app)
 
+    # Registered before the DB session hooks: teardown functions run in reverse
+    # order, so this one runs last and includes the COMMIT in DB time
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started_at = time.perf_counter()
+        g.metrics_token = start_request_stats()
+
+    @app.after_request
+    def capture_response_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def record_request_metrics(exc):
+        started_at = g.pop('metrics_started_at', None)
+        token = g.pop('metrics_token', None)
+        if started_at is None or token is None:
+            return
+
+        stats = finish_request_stats(token)
+        metrics.observe_request(
+            request.endpoint or 'unmatched',
+            request.method,
+            getattr(g, 'metrics_status', 500),
+            time.perf_counter() - started_at,
+            stats,
+        )
+
+    # N+1 detection and per-view query budgets, only enforced when
+    # QUERY_GUARD_MODE is warn (the development default) or raise. The
+    # X-Query-Count header shows a request's count in the browser's dev tools.
+    @app.before_request
+    def start_query_guard():
+        view = app.view_functions.get(request.endpoint)
+        g.query_guard_token = start_tracking(
+            app.config['QUERY_GUARD_MODE'],
+            app.config['QUERY_GUARD_REPEAT_LIMIT'],
+            getattr(view, 'query_budget', None),
+        )
+
+    @app.after_request
+    def check_query_budget(response):
+        tracker = get_tracker()
+        if tracker is not None:
+            response.headers['X-Query-Count'] = str(tracker.statements)
+            check_budget(tracker, request.endpoint)
+        return response
+
+    @app.teardown_request
+    def stop_query_guard(exc):
+        finish_tracking(g.pop('query_guard_token', None))
+
+    def request_uses_primary():
+        if request.method not in ('GET', 'HEAD'):
+            return True
+
+        view = app.view_functions.get(request.endpoint)
+        if getattr(view, 'use_primary_db', False):
+            return True
+
+        # Read-your-writes: stay on the primary for a while after writing
+        primary_until = session.get('db_primary_until')
+        return primary_until is not None and primary_until > time.time()
+
     @app.before_request
     def open_db_session():
-        g.db = get_session()
+        # Cheap proxy, a pooled connection is only checked out on first use
+        g.db = LazySession(use_primary_fn=request_uses_primary)
+
+    @app.after_request
+    def mark_primary_sticky(response):
+        db = getattr(g, 'db', None)
+        if db is not None and db.did_write and has_replicas():
+            session['db_primary_until'] = (
+                int(time.time()) + app.config['DB_READ_YOUR_WRITES_SECONDS']
+            )
+        return response
 
     @app.teardown_request
     def close_db_session(exc):
@@ -104,38 +318,41 @@ def create_app():
         if db is None:
             return
 
-        try:
-            if exc is None:
-                db.commit()
-            else:
-                db.rollback()
-        finally:
-            db.close()
+        db.finish(exc)
 
     @app.context_processor
     def inject_template_globals():
         user_id = session.get('user_id')
-        current_user_display_name = None
-
-        if user_id is not None:
-            user = _get_current_user(g.db, user_id)
-            if user is not None:
-                current_user_display_name = _build_compact_user_display_name(user)
+        current_user_display_name = _get_current_user_display_name(
+            g.db,
+            user_id,
+        )
 
         return {
             'is_logged_in': bool(user_id is not None),
             'current_user_display_name': current_user_display_name,
         }
 
-    @app.get('/health')
-    @login_required
-    def health():
-        try:
-            ping_db()
-        except Exception:
-            return 'database error', 500
+    # Unauthenticated probes for load balancers, neither touches g.db
+    @app.get('/livez')
+    def livez():
         return 'ok', 200
 
+    @app.get('/readyz')
+    def readyz():
+        is_ready, details = readiness_probe.check()
+        return jsonify(details), (200 if is_ready else 503)
+
+    @app.get('/metrics')
+    def prometheus_metrics():
+        return Response(
+            metrics.render_prometheus(
+                get_pool_stats(),
+                sse_streams=broadcaster.subscriber_count(),
+            ),
+            mimetype='text/plain; version=0.0.4',
+        )
+
     @app.get('/')
     def public_landing():
         if session.get('user_id') is not None:
@@ -162,6 +379,8 @@ def create_app():
         return redirect(url_for('logged_out'))
 
     @app.get('/oauth/callback')
+    @primary_db
+    @query_budget(3)
     def oauth_callback():
         token = oauth.google.authorize_access_token()
 
@@ -187,6 +406,11 @@ def create_app():
                 403
             )
 
+        # Commit before dropping the cached display name, otherwise a request
+        # in between could re-cache the old name from the committed row
+        g.db.commit()
+        user_display_name_cache.pop(user_id)
+
         next_url = session.get('next_url', url_for('home'))
 
         session.clear()
@@ -196,6 +420,7 @@ def create_app():
 
     @app.get('/home')
     @login_required
+    @query_budget(4)
     def home():
         user_id = session.get('user_id')
 
@@ -229,47 +454,263 @@ def create_app():
             [s['short_name'] for s in school_options]
         )
 
-        demo = get_demo_home_options()
+        # Run type and date default from each school's own clock, the bus
+        # checkboxes start out for the first school in the dropdown
+        options = get_home_options(g.db, school_options)
+        for school in school_options:
+            defaults = options['school_defaults'][school['id']]
+            school['default_run_type_code'] = defaults['run_type_code']
+            school['default_date_iso'] = defaults['date_iso']
+        first_school = school_options[0]
+
+        etag = page_etag(
+            page_version(),
+            'home',
+            user_id,
+            _get_current_user_display_name(g.db, user_id),
+            get_cache_version(g.db, MEMBERSHIP_VERSION),
+            options['reference_version'],
+            # Names and per-school defaults, which move with the clock
+            [sorted(school.items()) for school in school_options],
+        )
+        if request.if_none_match.contains(etag):
+            return not_modified(etag)
 
-        return render_template(
+        html = render_template(
             'home.html',
             page_title='Bus Tracker Home',
             school_options=school_options,
             school_short_names_display=school_short_names_display,
-            run_type_options=demo['run_type_options'],
-            bus_options=demo['bus_options'],
-            default_run_type_code=demo['default_run_type_code'],
-            default_date_iso=demo['default_date_iso'],
+            run_type_options=options['run_type_options'],
+            bus_options=options['bus_options'],
+            default_run_type_code=first_school['default_run_type_code'],
+            default_date_iso=first_school['default_date_iso'],
         )
+        return set_page_etag(make_response(html), etag)
 
-    @app.post('/bus-runs')
+    @app.get('/bus-options.json')
     @login_required
-    def create_or_open_bus_run():
-        # Placeholder for Phase 1 route skeleton.
-        # Later this will validate form input, create/fetch bus_run, and redirect.
+    @query_budget(3)
+    def bus_options():
+        # Bus picker on /home, refetched by home.js when the school or run
+        # type changes. Answered from the reference data registry.
+        school_id = request.args.get('school_id', type=int)
+        run_type_code = _norm_str(request.args.get('run_type_code'))
+        if school_id is None or run_type_code is None:
+            return jsonify({'error': 'school_id and run_type_code required'}), 400
+
+        user_id = session.get('user_id')
+        if not user_has_school_access(g.db, user_id, school_id):
+            return jsonify({'error': 'forbidden'}), 403
+
+        options, version = get_bus_options(g.db, school_id, run_type_code)
+        if options is None:
+            return jsonify({'error': 'unknown run type'}), 404
+
+        response = jsonify({
+            'school_id': school_id,
+            'run_type_code': run_type_code,
+            'buses': list(options),
+        })
+        # Revalidate every time, a reference data reload changes the ETag
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.set_etag('%s-%s-%s' % (version, school_id, run_type_code))
+        return response.make_conditional(request)
+
+    def render_bus_run_error(heading, message, status):
         return (
             render_template(
                 'message.html',
-                page_title='Not Implemented Yet',
-                heading='Track Buses Coming Soon',
-                message=(
-                    'The /bus-runs POST route is wired up, but the create/find '
-                    'bus_run logic is not implemented yet.'
-                ),
+                page_title=heading,
+                heading=heading,
+                message=message,
                 primary_action_label='Back to Home',
                 primary_action_url=url_for('home'),
             ),
-            501
+            status
+        )
+
+    def load_bus_run_or_error(loader, bus_run_public_id):
+        """
+        Returns (view_data, None) or (None, error_response)
+        """
+        view_data = loader(g.db, bus_run_public_id)
+        if view_data is None:
+            return None, render_bus_run_error(
+                'Bus Run Not Found',
+                MSG_BUS_RUN_NOT_FOUND,
+                404,
+            )
+
+        user_id = session.get('user_id')
+        if not user_has_school_access(g.db, user_id, view_data['school_id']):
+            return None, render_bus_run_error(
+                'Access Denied',
+                MSG_BUS_RUN_NO_ACCESS,
+                403,
+            )
+
+        return view_data, None
+
+    def bus_run_page_etag(page, bus_run_public_id, change_version):
+        # change_version covers the tiles. School names move the membership
+        # version, run type and bus names the reference version (the seed
+        # script bumps both).
+        user_id = session.get('user_id')
+        return page_etag(
+            page_version(),
+            page,
+            _get_current_user_display_name(g.db, user_id),
+            get_cache_version(g.db, MEMBERSHIP_VERSION),
+            get_cache_version(g.db, REFERENCE_DATA_VERSION),
+            bus_run_public_id,
+            change_version,
+        )
+
+    def bus_run_not_modified(page, bus_run_public_id):
+        """
+        A 304 when the client's copy of a run page is still current, judged
+        from the run's change cursor alone. None means render as usual
+        (including missing or forbidden runs, which the loader reports).
+        """
+        if not request.if_none_match:
+            return None
+
+        run_ref = get_bus_run_ref(g.db, bus_run_public_id)
+        if run_ref is None:
+            return None
+
+        user_id = session.get('user_id')
+        if not user_has_school_access(g.db, user_id, run_ref.school_id):
+            return None
+
+        etag = bus_run_page_etag(
+            page,
+            run_ref.public_id,
+            run_ref.change_version,
         )
+        if request.if_none_match.contains(etag):
+            return not_modified(etag)
+        return None
+
+    @app.get('/dashboard')
+    @login_required
+    @query_budget(3)
+    def dashboard():
+        user_id = session.get('user_id')
+
+        schools = get_user_allowed_schools(g.db, user_id)
+        if not schools:
+            return (
+                render_template(
+                    'message.html',
+                    page_title='Access Denied',
+                    heading='Access Denied',
+                    message=MSG_NO_SCHOOLS,
+                    primary_action_label='Log Out',
+                    primary_action_url=url_for('logout'),
+                ),
+                403
+            )
+
+        return render_template(
+            'dashboard.html',
+            page_title='Dashboard',
+            schools=load_dashboard(g.db, schools),
+        )
+
+    @app.post('/bus-runs')
+    @login_required
+    @query_budget(12)
+    def create_or_open_bus_run():
+        # "Track Buses" on /home: everyone submitting the same school, date
+        # and run type ends up on the same run
+        user_id = session.get('user_id')
+
+        school_id = request.form.get('school_id', type=int)
+        run_type_code = _norm_str(request.form.get('run_type_code'))
+        bus_codes = [
+            c for c in (_norm_str(v) for v in request.form.getlist('bus_codes'))
+            if c is not None
+        ]
+        try:
+            run_date = date.fromisoformat(request.form.get('run_date', ''))
+        except ValueError:
+            run_date = None
+
+        if school_id is None or run_date is None or run_type_code is None:
+            return render_bus_run_error(
+                'Invalid Request',
+                MSG_BUS_RUN_BAD_FORM,
+                400,
+            )
+
+        if not bus_codes:
+            return render_bus_run_error(
+                'No Buses Selected',
+                MSG_BUS_RUN_NO_BUSES,
+                400,
+            )
+
+        if not user_has_school_access(g.db, user_id, school_id):
+            return render_bus_run_error(
+                'Access Denied',
+                MSG_BUS_RUN_NO_ACCESS,
+                403,
+            )
+
+        run_type_id = get_run_type_id(g.db, run_type_code)
+        if run_type_id is None:
+            return render_bus_run_error(
+                'Invalid Request',
+                MSG_BUS_RUN_BAD_FORM,
+                400,
+            )
+
+        found = find_or_create_bus_run(
+            g.db,
+            school_id,
+            run_date,
+            run_type_id,
+            bus_codes,
+            user_id,
+        )
+        if found is None:
+            g.db.rollback()
+            return render_bus_run_error(
+                'Bus Run Deleted',
+                MSG_BUS_RUN_DELETED,
+                409,
+            )
+
+        public_id, created, added_count = found
+        if created and added_count == 0:
+            g.db.rollback()
+            return render_bus_run_error(
+                'No Buses Selected',
+                MSG_BUS_RUN_NO_BUSES,
+                400,
+            )
+
+        g.db.commit()
+        return redirect(url_for('view_bus_run', bus_run_public_id=public_id))
 
     @app.get('/bus-runs/<bus_run_public_id>')
     @login_required
+    @query_budget(5)
     def view_bus_run(bus_run_public_id):
-        # Placeholder for Phase 1 route skeleton.
-        # Later this will load the run + statuses and enforce school access.
-        view_data = get_demo_bus_run_view(bus_run_public_id)
+        response = bus_run_not_modified('bus_run', bus_run_public_id)
+        if response is not None:
+            return response
 
-        return render_template(
+        view_data, error = load_bus_run_or_error(
+            load_bus_run_view,
+            bus_run_public_id,
+        )
+        if error is not None:
+            return error
+
+        html = render_template(
             'bus_run.html',
             page_title='Bus Run',
             bus_run_public_id=view_data['bus_run_public_id'],
@@ -278,16 +719,180 @@ def create_app():
             run_type_label=view_data['run_type_label'],
             show_buses_rolling=view_data['show_buses_rolling'],
             tiles=view_data['tiles'],
+            change_version=view_data['change_version'],
+            max_student_count=MAX_STUDENT_COUNT,
+        )
+        etag = bus_run_page_etag(
+            'bus_run',
+            view_data['bus_run_public_id'],
+            view_data['change_version'],
+        )
+        return set_page_etag(make_response(html), etag)
+
+    @app.get('/bus-runs/<bus_run_public_id>/tiles.json')
+    @primary_db
+    @login_required
+    @query_budget(4)
+    def bus_run_tile_changes(bus_run_public_id):
+        # Polling alternative to /events: ?since=<cursor> returns only tiles
+        # changed after that cursor, 304 when nothing changed. No since (or a
+        # cursor from the future, e.g. after a restore) returns every tile.
+        # Read from the primary: a lagging replica would look like a cursor
+        # from the future and send the client an older snapshot.
+        since = request.args.get('since', type=int)
+
+        view_data = load_tile_changes(g.db, bus_run_public_id, since)
+        if view_data is None:
+            return jsonify({'error': 'bus run not found'}), 404
+
+        user_id = session.get('user_id')
+        if not user_has_school_access(g.db, user_id, view_data['school_id']):
+            return jsonify({'error': 'forbidden'}), 403
+
+        cursor = view_data['change_version']
+        tiles = view_data['tiles']
+        is_full = since is None
+
+        if since is not None and since > cursor:
+            view_data = load_tile_changes(g.db, bus_run_public_id, None)
+            cursor = view_data['change_version']
+            tiles = view_data['tiles']
+            is_full = True
+        elif since == cursor:
+            return Response(status=304, headers={'Cache-Control': 'no-cache'})
+
+        response = jsonify({
+            'bus_run_public_id': view_data['bus_run_public_id'],
+            'cursor': cursor,
+            'full': is_full,
+            'tiles': tiles,
+        })
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    @app.get('/bus-runs/<bus_run_public_id>/events')
+    @login_required
+    @query_budget(3)
+    def bus_run_events(bus_run_public_id):
+        # Server-Sent Events stream of tile changes for bus_run.html. The DB
+        # session is released when this returns, before streaming starts.
+        run_ref = get_bus_run_ref(g.db, bus_run_public_id)
+        if run_ref is None:
+            return 'bus run not found', 404
+
+        user_id = session.get('user_id')
+        if not user_has_school_access(g.db, user_id, run_ref.school_id):
+            return 'forbidden', 403
+
+        ensure_change_feed(app.config['CHANGE_FEED_POLL_SECONDS'])
+
+        try:
+            stream = stream_run_events(run_ref.public_id)
+        except TooManyStreams:
+            # bus_run.js polls tiles.json instead when the stream fails
+            return Response(
+                'too many open streams',
+                status=503,
+                headers={'Retry-After': '30'},
+            )
+
+        return Response(
+            stream,
+            mimetype='text/event-stream',
+            headers={
+                'Cache-Control': 'no-cache',
+                # Stop nginx-style proxies from buffering the stream
+                'X-Accel-Buffering': 'no',
+            },
         )
 
+    @app.post('/bus-runs/<bus_run_public_id>/events/batch')
+    @login_required
+    @query_budget(16)
+    def post_bus_run_events(bus_run_public_id):
+        # Tile button presses from bus_run.js, batched and keyed so retries
+        # are harmless. Locks the run row for the rest of the transaction.
+        run_ref = get_bus_run_ref(g.db, bus_run_public_id, for_update=True)
+        if run_ref is None:
+            return jsonify({'error': 'bus run not found'}), 404
+
+        user_id = session.get('user_id')
+        if not user_has_school_access(g.db, user_id, run_ref.school_id):
+            return jsonify({'error': 'forbidden'}), 403
+
+        try:
+            events = parse_status_events(request.get_json(silent=True))
+            result = apply_status_events(g.db, run_ref, user_id, events)
+        except InvalidStatusEvents as e:
+            g.db.rollback()
+            return jsonify({'error': str(e)}), 400
+        except StatusTypesNotConfigured as e:
+            g.db.rollback()
+            app.logger.error('%s', e)
+            return jsonify({'error': MSG_STATUS_TYPES_MISSING}), 503
+
+        # Commit before answering so a 200 always means the events are stored
+        g.db.commit()
+        return jsonify(result)
+
+    @app.post('/bus-runs/<bus_run_public_id>/buses-rolling')
+    @login_required
+    @query_budget(11)
+    def post_buses_rolling(bus_run_public_id):
+        run_ref = get_bus_run_ref(g.db, bus_run_public_id, for_update=True)
+        if run_ref is None:
+            return jsonify({'error': 'bus run not found'}), 404
+
+        user_id = session.get('user_id')
+        if not user_has_school_access(g.db, user_id, run_ref.school_id):
+            return jsonify({'error': 'forbidden'}), 403
+
+        if not run_ref.is_departure:
+            return jsonify({'error': 'not a departure run'}), 400
+
+        try:
+            result = mark_buses_rolling(g.db, run_ref, user_id)
+        except StatusTypesNotConfigured as e:
+            g.db.rollback()
+            app.logger.error('%s', e)
+            return jsonify({'error': MSG_STATUS_TYPES_MISSING}), 503
+
+        g.db.commit()
+        return jsonify(result)
+
+    @app.get('/bus-runs/<bus_run_public_id>/history.json')
+    @login_required
+    @query_budget(4)
+    def bus_run_history(bus_run_public_id):
+        run_ref = get_bus_run_ref(g.db, bus_run_public_id)
+        if run_ref is None:
+            return jsonify({'error': 'bus run not found'}), 404
+
+        user_id = session.get('user_id')
+        if not user_has_school_access(g.db, user_id, run_ref.school_id):
+            return jsonify({'error': 'forbidden'}), 403
+
+        return jsonify({
+            'bus_run_public_id': run_ref.public_id,
+            'events': get_bus_run_history(g.db, run_ref.id),
+        })
+
     @app.get('/bus-runs/<bus_run_public_id>/edit')
     @login_required
+    @query_budget(6)
     def edit_bus_run(bus_run_public_id):
-        # Placeholder for Phase 1 route skeleton.
-        # Later this will load the run + current bus selection for editing.
-        view_data = get_demo_bus_run_edit_view(bus_run_public_id)
+        response = bus_run_not_modified('bus_run_edit', bus_run_public_id)
+        if response is not None:
+            return response
 
-        return render_template(
+        view_data, error = load_bus_run_or_error(
+            load_bus_run_edit_view,
+            bus_run_public_id,
+        )
+        if error is not None:
+            return error
+
+        html = render_template(
             'bus_run_edit.html',
             page_title='Edit Bus Run',
             bus_run_public_id=view_data['bus_run_public_id'],
@@ -296,5 +901,11 @@ def create_app():
             run_type_label=view_data['run_type_label'],
             bus_options=view_data['bus_options'],
         )
+        etag = bus_run_page_etag(
+            'bus_run_edit',
+            view_data['bus_run_public_id'],
+            view_data['change_version'],
+        )
+        return set_page_etag(make_response(html), etag)
 
     return app
@@ -0,0 +1,194 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+
+from collections import namedtuple
+
+from flask import Response, abort, request, url_for
+
+
+# Hashed URLs never change content, so browsers can keep them for a year
+# without revalidating
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Worth gzipping, everything else (images, fonts) is already compressed
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.json', '.svg', '.txt', '.html')
+
+# Too small to gain anything from gzip
+MIN_COMPRESS_BYTES = 512
+
+# With reload on, files are re-checked for changes at most this often
+RELOAD_CHECK_SECONDS = 1
+
+Asset = namedtuple('Asset', [
+    'path',
+    'hashed_name',
+    'mimetype',
+    'body',
+    'gzip_body',
+    'etag',
+])
+
+
+def _hashed_name(path, digest):
+    # css/styles.css -> css/styles.0a1b2c3d4e5f.css
+    base, ext = os.path.splitext(path)
+    return '%s.%s%s' % (base, digest[:12], ext)
+
+
+def _load_asset(static_dir, path):
+    with open(os.path.join(static_dir, path), 'rb') as f:
+        body = f.read()
+
+    digest = hashlib.sha256(body).hexdigest()
+
+    gzip_body = None
+    if (path.endswith(COMPRESSIBLE_EXTENSIONS)
+            and len(body) >= MIN_COMPRESS_BYTES):
+        compressed = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(compressed) < len(body):
+            gzip_body = compressed
+
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    return Asset(
+        path=path,
+        hashed_name=_hashed_name(path, digest),
+        mimetype=mimetype,
+        body=body,
+        gzip_body=gzip_body,
+        etag=digest[:32],
+    )
+
+
+def _scan(static_dir):
+    """
+    Every file under static_dir as (relative path with '/' separators,
+    mtime), sorted.
+    """
+    found = []
+    for root, dirs, files in os.walk(static_dir):
+        dirs.sort()
+        for name in sorted(files):
+            full = os.path.join(root, name)
+            rel = os.path.relpath(full, static_dir).replace(os.sep, '/')
+            found.append((rel, os.path.getmtime(full)))
+    return found
+
+
+class AssetManifest:
+    """
+    Content-hashed copies of everything in the static folder, held in memory
+    with a gzip variant compressed once up front.
+
+    Built when the app starts. With reload on (development) a changed file is
+    picked up on the next request; in production assets change only with a
+    deploy, which restarts the workers anyway.
+    """
+
+    def __init__(self, static_dir, reload=False):
+        self.static_dir = static_dir
+        self.reload = bool(reload)
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self._build()
+
+    def _build(self):
+        scanned = _scan(self.static_dir)
+
+        by_path = {}
+        for path, _mtime in scanned:
+            by_path[path] = _load_asset(self.static_dir, path)
+
+        h = hashlib.sha1()
+        for path in sorted(by_path):
+            h.update(by_path[path].hashed_name.encode('utf-8'))
+
+        self._scanned = scanned
+        self._by_path = by_path
+        self._by_hashed_name = {a.hashed_name: a for a in by_path.values()}
+        self.version = h.hexdigest()[:16]
+
+    def _refresh(self):
+        if not self.reload:
+            return
+
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+
+        with self._lock:
+            if now < self._next_check:
+                return
+            self._next_check = now + RELOAD_CHECK_SECONDS
+            if _scan(self.static_dir) != self._scanned:
+                self._build()
+
+    def get_version(self):
+        """
+        Changes whenever any asset's content does. Pages that embed asset
+        URLs include it in their ETag.
+        """
+        self._refresh()
+        return self.version
+
+    def hashed_name(self, path):
+        self._refresh()
+        asset = self._by_path.get(path)
+        return None if asset is None else asset.hashed_name
+
+    def get(self, hashed_name):
+        self._refresh()
+        return self._by_hashed_name.get(hashed_name)
+
+
+def _accepts_gzip():
+    return 'gzip' in request.headers.get('Accept-Encoding', '').lower()
+
+
+def init_assets(app, reload=False):
+    """
+    Build the manifest, register the /assets/ route and the asset_url()
+    template global. Templates use asset_url('styles.css') instead of
+    url_for('static', ...).
+    """
+    manifest = AssetManifest(app.static_folder, reload=reload)
+
+    def asset_url(path):
+        hashed = manifest.hashed_name(path)
+        if hashed is None:
+            # Not in the static folder, let Flask's static route 404 it
+            return url_for('static', filename=path)
+        return url_for('asset', filename=hashed)
+
+    @app.get('/assets/<path:filename>')
+    def asset(filename):
+        found = manifest.get(filename)
+        if found is None:
+            abort(404)
+
+        use_gzip = found.gzip_body is not None and _accepts_gzip()
+        # Each encoding is a different representation, so its own ETag
+        etag = found.etag + ('-gz' if use_gzip else '')
+
+        # A browser asking again already has the only version there is
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        elif use_gzip:
+            response = Response(found.gzip_body, mimetype=found.mimetype)
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = Response(found.body, mimetype=found.mimetype)
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        if found.gzip_body is not None:
+            response.headers['Vary'] = 'Accept-Encoding'
+        return response
+
+    app.add_template_global(asset_url, 'asset_url')
+    app.extensions['asset_manifest'] = manifest
+    return manifest
@@ -1,7 +1,8 @@
 from datetime import datetime
 
-from sqlalchemy import func, select
+from sqlalchemy import case, func, or_, select
 
+from bustracker.cache import MEMBERSHIP_VERSION, TTLCache, get_cache_version
 from bustracker.models.school import School
 from bustracker.models.user import User
 from bustracker.models.user_school import UserSchool
@@ -68,21 +69,63 @@ MSG_SUB_MISMATCH = (
 )
 
 
+# user_id -> compact display name for the "Signed in as" header, per worker.
+# Entries are dropped on login (when the name fields are synced from Google),
+# other workers pick up the change when their TTL runs out.
+user_display_name_cache = TTLCache(maxsize=4096, ttl_seconds=300)
+
+
+# (membership version, user_id) -> allowed school rows, per worker. Bumping the
+# membership version (see bustracker.cache) makes every old entry unreachable,
+# and LRU eviction clears them out.
+allowed_schools_cache = TTLCache(maxsize=4096, ttl_seconds=600)
+
+
 def _norm_email(email):
     if email is None:
         return None
     return str(email).strip().lower()
 
 
-def _get_active_school_count(db, user_id):
-    stmt = (
+def _lookup_user_for_gate(db, sub, email):
+    """
+    Resolve the user by sub (preferred) or email and count their active schools
+    in a single statement.
+
+    Returns: (user_or_none, found_by, active_school_count)
+      found_by is 'sub', 'email' or None
+    """
+    active_school_count = (
         select(func.count())
         .select_from(UserSchool)
         .join(School, School.id == UserSchool.school_id)
-        .where(UserSchool.user_id == user_id)
+        .where(UserSchool.user_id == User.id)
         .where(School.is_active == True)
+        .correlate(User)
+        .scalar_subquery()
     )
-    return int(db.execute(stmt).scalar() or 0)
+
+    # Same precedence as the old sequential lookups: a sub match always wins
+    # over an email match on a different row
+    matched_by_sub = case((User.google_sub == sub, 1), else_=0)
+
+    stmt = (
+        select(
+            User,
+            matched_by_sub.label('matched_by_sub'),
+            active_school_count.label('active_school_count'),
+        )
+        .where(or_(User.google_sub == sub, User.email_normalized == email))
+        .order_by(matched_by_sub.desc())
+        .limit(1)
+    )
+    row = db.execute(stmt).first()
+
+    if row is None:
+        return None, None, 0
+
+    found_by = 'sub' if row.matched_by_sub == 1 else 'email'
+    return row.User, found_by, int(row.active_school_count or 0)
 
 
 def sync_user_from_google_claims(db, claims):
@@ -120,22 +163,12 @@ def sync_user_from_google_claims(db, claims):
     if email is None or email == '':
         return None, MSG_NO_USER
 
-    # 1) Try by sub first
+    # Lookup by sub first, then email, plus the active school count, all in one
+    # round-trip
     # TODO: Consider handling edge case where google_sub has leading/trailing
     # whitespace (could cause sub-first lookup miss; fix by trimming on write or
     # one-time DB cleanup)
-    stmt = select(User).where(User.google_sub == sub)
-    user = db.execute(stmt).scalar_one_or_none()
-
-    found_by = 'sub' if user is not None else None
-
-    # 2) Fallback: try by email
-    if user is None:
-        stmt = select(User).where(func.lower(User.email) == email)
-        user = db.execute(stmt).scalar_one_or_none()
-        found_by = 'email' if user is not None else None
-
-    # print(found_by)
+    user, found_by, active_school_count = _lookup_user_for_gate(db, sub, email)
 
     # Gate #1
     if user is None:
@@ -146,7 +179,6 @@ def sync_user_from_google_claims(db, claims):
         return None, MSG_INACTIVE_USER
 
     # Gate #3
-    active_school_count = _get_active_school_count(db, user.id)
     if active_school_count <= 0:
         return None, MSG_NO_SCHOOLS
 
@@ -175,6 +207,7 @@ def sync_user_from_google_claims(db, claims):
     user.family_name = family_name
     user.last_login_at_utc = datetime.utcnow()
 
+    # The caller drops user_display_name_cache[user.id] once this commits
     return user.id, None
 
 
@@ -183,7 +216,16 @@ def get_user_allowed_schools(db, user_id):
     Returns rows of:
       (school_id, short_name, long_name, timezone)
     Only active schools.
+
+    Cached per worker, keyed by the user_schools membership version.
     """
+    version = get_cache_version(db, MEMBERSHIP_VERSION)
+    cache_key = (version, user_id)
+
+    rows = allowed_schools_cache.get(cache_key)
+    if rows is not None:
+        return rows
+
     stmt = (
         select(School.id, School.short_name, School.long_name, School.timezone)
         .select_from(UserSchool)
@@ -192,4 +234,18 @@ def get_user_allowed_schools(db, user_id):
         .where(School.is_active == True)
         .order_by(School.short_name.asc())
     )
-    return db.execute(stmt).all()
+    rows = tuple(db.execute(stmt).all())
+
+    allowed_schools_cache.set(cache_key, rows)
+    return rows
+
+
+def user_has_school_access(db, user_id, school_id):
+    """
+    True if school_id is one of the user's active schools. Uses the same cached
+    rows as get_user_allowed_schools, so usually costs no query.
+    """
+    for r in get_user_allowed_schools(db, user_id):
+        if int(r.id) == int(school_id):
+            return True
+    return False
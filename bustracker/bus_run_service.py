@@ -0,0 +1,435 @@
+import uuid
+
+from datetime import timezone
+
+from sqlalchemy import and_, insert, literal, select, update
+
+from bustracker.change_feed import record_tile_changes
+from bustracker.db import dialect_insert, on_conflict_ignore
+
+from bustracker.models.bus_run import BusRun
+from bustracker.models.bus_run_status import BusRunStatus
+from bustracker.models.run_type import RunType
+from bustracker.models.school import School
+from bustracker.models.school_bus import SchoolBus
+from bustracker.models.school_bus_run_type import SchoolBusRunType
+from bustracker.models.status_type import StatusType
+from bustracker.reference_data import get_reference_data
+from bustracker.rollup_service import add_waiting_tiles
+from bustracker.timezones import get_zone
+
+
+# Shown for tiles with no status event yet
+WAITING_STATUS_LABEL = 'Waiting'
+
+
+def format_local_time(dt_utc, tz_name):
+    if dt_utc is None:
+        return ''
+
+    local = dt_utc.replace(tzinfo=timezone.utc).astimezone(get_zone(tz_name))
+    return local.strftime('%I:%M %p').lstrip('0')
+
+
+def _header_columns():
+    return (
+        BusRun.id.label('bus_run_id'),
+        BusRun.public_id.label('bus_run_public_id'),
+        BusRun.school_id,
+        BusRun.run_date,
+        School.long_name.label('school_name'),
+        School.timezone.label('school_timezone'),
+        RunType.display_name.label('run_type_label'),
+        RunType.is_departure,
+        BusRun.change_version,
+    )
+
+
+def _build_header(row):
+    return {
+        'bus_run_id': int(row.bus_run_id),
+        'bus_run_public_id': str(row.bus_run_public_id),
+        'school_id': int(row.school_id),
+        'school_name': str(row.school_name),
+        'school_timezone': str(row.school_timezone),
+        'run_date': row.run_date,
+        'run_type_label': str(row.run_type_label),
+        'is_departure': bool(row.is_departure),
+        'change_version': int(row.change_version),
+    }
+
+
+def _build_tile(row, tz_name):
+    status_label = row.status_label or WAITING_STATUS_LABEL
+
+    return {
+        'school_bus_public_id': str(row.school_bus_public_id),
+        'bus_label': str(row.bus_label),
+        'color_name': row.color_name,
+        'hex_color': row.hex_color,
+        'sort_order': row.sort_order,
+        'status_code': row.status_type_code,
+        'status_label': status_label,
+        'status_hex_color': row.status_hex_color,
+        'check_in_time': format_local_time(row.check_in_at_utc, tz_name),
+        'student_count': '' if row.student_count is None else row.student_count,
+        'departure_time': format_local_time(row.departure_at_utc, tz_name),
+        'has_departed': row.departure_at_utc is not None,
+    }
+
+
+def _tile_query(since_version=None):
+    """
+    Header columns + one row per tile. LEFT JOINs so a run with no buses still
+    returns its header (as a single row with NULL tile columns).
+
+    With since_version only tiles changed after that version are joined, read
+    through ix_bus_run_statuses_run_version.
+    """
+    status_join = BusRunStatus.bus_run_id == BusRun.id
+    if since_version is not None:
+        status_join = and_(
+            status_join,
+            BusRunStatus.change_version > since_version,
+        )
+
+    return (
+        select(
+            *_header_columns(),
+            SchoolBus.public_id.label('school_bus_public_id'),
+            SchoolBus.display_name.label('bus_label'),
+            SchoolBus.color_name,
+            SchoolBus.hex_color,
+            SchoolBus.sort_order,
+            StatusType.status_type_code,
+            StatusType.display_name.label('status_label'),
+            StatusType.hex_color.label('status_hex_color'),
+            BusRunStatus.check_in_at_utc,
+            BusRunStatus.student_count,
+            BusRunStatus.departure_at_utc,
+        )
+        .select_from(BusRun)
+        .join(School, School.id == BusRun.school_id)
+        .join(RunType, RunType.id == BusRun.run_type_id)
+        .outerjoin(BusRunStatus, status_join)
+        .outerjoin(SchoolBus, SchoolBus.id == BusRunStatus.school_bus_id)
+        .outerjoin(StatusType, StatusType.id == BusRunStatus.status_type_id)
+        .where(BusRun.is_active == True)
+        .order_by(
+            SchoolBus.sort_order.is_(None),
+            SchoolBus.sort_order.asc(),
+            SchoolBus.display_name.asc(),
+        )
+    )
+
+
+def load_bus_run_view(db, bus_run_public_id):
+    """
+    Everything /bus-runs/<public_id> renders, in one round-trip.
+
+    Returns None if the run doesn't exist (or was soft deleted), otherwise the
+    header fields plus:
+      'tiles': [tile dict, ...] ordered by sort_order, display_name
+      'show_buses_rolling': departure run with at least one bus not departed
+    """
+    stmt = _tile_query().where(BusRun.public_id == str(bus_run_public_id))
+    rows = db.execute(stmt).all()
+
+    if not rows:
+        return None
+
+    view = _build_header(rows[0])
+    tz_name = view['school_timezone']
+
+    tiles = []
+    for r in rows:
+        if r.school_bus_public_id is None:
+            continue
+        tiles.append(_build_tile(r, tz_name))
+
+    view['tiles'] = tiles
+    view['show_buses_rolling'] = view['is_departure'] and any(
+        not t['has_departed'] for t in tiles
+    )
+    return view
+
+
+def load_tile_changes(db, bus_run_public_id, since_version):
+    """
+    Tiles changed after since_version, for clients polling
+    /bus-runs/<public_id>/tiles.json. One round-trip that returns just the
+    header row when nothing changed.
+
+    Returns None if the run doesn't exist, otherwise the header fields plus
+    'tiles' (changed tiles only).
+    """
+    stmt = (
+        _tile_query(since_version=since_version)
+        .where(BusRun.public_id == str(bus_run_public_id))
+    )
+    rows = db.execute(stmt).all()
+
+    if not rows:
+        return None
+
+    view = _build_header(rows[0])
+    tz_name = view['school_timezone']
+
+    view['tiles'] = [
+        _build_tile(r, tz_name)
+        for r in rows
+        if r.school_bus_public_id is not None
+    ]
+    return view
+
+
+def bump_run_version(db, run_ref, school_bus_ids):
+    """
+    Record a change to the given tiles of a run: sets bus_runs.change_version
+    to the next value and stamps it on those tiles. Call in the same
+    transaction as the change itself.
+
+    run_ref must come from get_bus_run_ref(..., for_update=True): the row lock
+    means nobody else can move the version, so the new value is known without
+    reading it back. Returns the new version.
+    """
+    version = int(run_ref.change_version) + 1
+
+    db.execute(
+        update(BusRun)
+        .where(BusRun.id == run_ref.id)
+        .values(change_version=version)
+    )
+
+    school_bus_ids = list(school_bus_ids)
+    if school_bus_ids:
+        db.execute(
+            update(BusRunStatus)
+            .where(BusRunStatus.bus_run_id == run_ref.id)
+            .where(BusRunStatus.school_bus_id.in_(school_bus_ids))
+            .values(change_version=version)
+        )
+
+    return version
+
+
+def load_bus_run_edit_view(db, bus_run_public_id):
+    """
+    Data for /bus-runs/<public_id>/edit: the run header plus every active bus
+    linked to the run's school and run type, with 'checked' set for buses
+    already in the run.
+
+    One round-trip, plus a header-only query when no buses are linked.
+    Returns None if the run doesn't exist.
+    """
+    stmt = (
+        select(
+            *_header_columns(),
+            SchoolBus.public_id.label('school_bus_public_id'),
+            SchoolBus.display_name.label('bus_label'),
+            BusRunStatus.id.label('bus_run_status_id'),
+        )
+        .select_from(BusRun)
+        .join(School, School.id == BusRun.school_id)
+        .join(RunType, RunType.id == BusRun.run_type_id)
+        .join(SchoolBus, SchoolBus.school_id == BusRun.school_id)
+        .join(
+            SchoolBusRunType,
+            and_(
+                SchoolBusRunType.school_bus_id == SchoolBus.id,
+                SchoolBusRunType.run_type_id == BusRun.run_type_id,
+            ),
+        )
+        .outerjoin(
+            BusRunStatus,
+            and_(
+                BusRunStatus.bus_run_id == BusRun.id,
+                BusRunStatus.school_bus_id == SchoolBus.id,
+            ),
+        )
+        .where(BusRun.public_id == str(bus_run_public_id))
+        .where(BusRun.is_active == True)
+        .where(SchoolBus.is_active == True)
+        .order_by(
+            SchoolBus.sort_order.is_(None),
+            SchoolBus.sort_order.asc(),
+            SchoolBus.display_name.asc(),
+        )
+    )
+    rows = db.execute(stmt).all()
+
+    if not rows:
+        header_stmt = (
+            select(*_header_columns())
+            .select_from(BusRun)
+            .join(School, School.id == BusRun.school_id)
+            .join(RunType, RunType.id == BusRun.run_type_id)
+            .where(BusRun.public_id == str(bus_run_public_id))
+            .where(BusRun.is_active == True)
+        )
+        header_row = db.execute(header_stmt).first()
+        if header_row is None:
+            return None
+
+        view = _build_header(header_row)
+        view['bus_options'] = []
+        return view
+
+    view = _build_header(rows[0])
+    view['bus_options'] = [
+        {
+            'code': str(r.school_bus_public_id),
+            'label': str(r.bus_label),
+            'checked': r.bus_run_status_id is not None,
+        }
+        for r in rows
+    ]
+    return view
+
+
+def get_bus_run_ref(db, bus_run_public_id, for_update=False):
+    """
+    Minimal lookup for routes that only need to authorize access to a run.
+    Returns a row of (id, public_id, school_id, change_version, is_departure)
+    or None.
+
+    for_update locks the run row until the transaction ends, which serializes
+    writers to one run.
+    """
+    stmt = (
+        select(
+            BusRun.id,
+            BusRun.public_id,
+            BusRun.school_id,
+            BusRun.change_version,
+            RunType.is_departure,
+        )
+        .join(RunType, RunType.id == BusRun.run_type_id)
+        .where(BusRun.public_id == str(bus_run_public_id))
+        .where(BusRun.is_active == True)
+    )
+    if for_update:
+        # Only the run row, not the shared run_types row
+        stmt = stmt.with_for_update(of=BusRun)
+    return db.execute(stmt).first()
+
+
+def get_run_type_id(db, run_type_code):
+    """
+    Active run type id for a run_type_code, or None.
+    """
+    run_type = get_reference_data(db).run_type_by_code.get(str(run_type_code))
+    return None if run_type is None else run_type.id
+
+
+def find_or_create_bus_run(db, school_id, run_date, run_type_id,
+                           school_bus_public_ids, user_id):
+    """
+    POST /bus-runs: open the run for (school, date, run type), creating it if
+    needed, and add the chosen buses. Safe when several people submit at once:
+    the upsert on uq_bus_runs_school_date_type makes every caller land on the
+    same row, and the statuses insert skips buses already in the run.
+
+    school_bus_public_ids are the bus_codes checkboxes (SchoolBus public_ids),
+    the caller rejects an empty selection. Codes that aren't active and linked
+    to the school and run type are ignored.
+
+    Three statements however many buses are chosen: insert-or-skip, locking
+    fetch and one INSERT ... SELECT for the tiles (plus the rollup, and the
+    change feed writes when buses are added to a run people may already be
+    watching).
+
+    Returns (public_id, created, added_count), or None when the run exists
+    but was soft deleted (it is left deleted). added_count is 0 when nothing
+    chosen was valid, for a new run the caller should roll back.
+    """
+    new_public_id = str(uuid.uuid4())
+
+    upsert = dialect_insert(BusRun.__table__).values(
+        public_id=new_public_id,
+        school_id=school_id,
+        run_date=run_date,
+        run_type_id=run_type_id,
+        created_by_user_id=user_id,
+    )
+    db.execute(on_conflict_ignore(
+        upsert,
+        ['school_id', 'run_date', 'run_type_id'],
+    ))
+
+    run = db.execute(
+        select(
+            BusRun.id,
+            BusRun.public_id,
+            BusRun.change_version,
+            BusRun.is_active,
+        )
+        .where(BusRun.school_id == school_id)
+        .where(BusRun.run_date == run_date)
+        .where(BusRun.run_type_id == run_type_id)
+        .with_for_update()
+    ).one()
+    if not run.is_active:
+        return None
+    created = run.public_id == new_public_id
+
+    # New tiles of an existing run carry the next version, so pages already
+    # open on it pick them up
+    tile_version = 0 if created else run.change_version + 1
+
+    bus_select = (
+        select(
+            literal(run.id),
+            SchoolBus.id,
+            literal(tile_version),
+        )
+        .join(
+            SchoolBusRunType,
+            and_(
+                SchoolBusRunType.school_bus_id == SchoolBus.id,
+                SchoolBusRunType.run_type_id == run_type_id,
+            ),
+        )
+        .where(SchoolBus.school_id == school_id)
+        .where(SchoolBus.is_active == True)
+        .where(
+            SchoolBus.public_id.in_([str(c) for c in school_bus_public_ids])
+        )
+        # Skip buses already in the run. Tiles are only added under the run
+        # row lock, so none can appear in between and the insert's rowcount
+        # is exactly what it added.
+        .where(
+            ~select(BusRunStatus.id)
+            .where(BusRunStatus.bus_run_id == run.id)
+            .where(BusRunStatus.school_bus_id == SchoolBus.id)
+            .exists()
+        )
+    )
+    added_count = db.execute(
+        insert(BusRunStatus.__table__).from_select(
+            ['bus_run_id', 'school_bus_id', 'change_version'],
+            bus_select,
+        )
+    ).rowcount
+
+    if added_count > 0:
+        add_waiting_tiles(db, run.id, school_id, run_date, added_count)
+
+    if added_count > 0 and not created:
+        # Run row is locked above, so nobody else bumped it in between
+        db.execute(
+            update(BusRun)
+            .where(BusRun.id == run.id)
+            .values(change_version=tile_version)
+        )
+
+        changes = load_tile_changes(db, run.public_id, tile_version - 1)
+        record_tile_changes(
+            db,
+            run.id,
+            run.public_id,
+            tile_version,
+            changes['tiles'],
+        )
+
+    return str(run.public_id), created, added_count
@@ -0,0 +1,115 @@
+import threading
+import time
+
+from collections import OrderedDict
+
+from sqlalchemy import select, update
+
+from bustracker.models.cache_version import CacheVersion
+
+
+# cache_versions.name values
+MEMBERSHIP_VERSION = 'user_schools'
+# run_types, status_types, school_buses, school_bus_run_types
+REFERENCE_DATA_VERSION = 'reference_data'
+
+# How long a worker trusts the version it last read before asking again, this
+# bounds how long a membership change can take to show up
+VERSION_CHECK_SECONDS = 5
+
+
+class TTLCache:
+    """
+    Small thread-safe LRU cache where every entry also expires after
+    ttl_seconds.
+
+    Instances live per worker process, nothing is shared between gunicorn
+    workers, so anything cached here must be safe to serve slightly stale
+    until the TTL runs out.
+    """
+
+    def __init__(self, maxsize, ttl_seconds):
+        if maxsize <= 0:
+            raise ValueError('maxsize must be > 0')
+
+        self.maxsize = int(maxsize)
+        self.ttl_seconds = float(ttl_seconds)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+
+            expires_at, value = item
+            if expires_at <= now:
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl_seconds
+
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            item = self._data.pop(key, None)
+        return None if item is None else item[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+_version_memo = TTLCache(maxsize=64, ttl_seconds=VERSION_CHECK_SECONDS)
+
+
+def get_cache_version(db, name):
+    """
+    Current value of a cache_versions counter. Re-read from the database at
+    most once every VERSION_CHECK_SECONDS per worker.
+    """
+    version = _version_memo.get(name)
+    if version is not None:
+        return version
+
+    stmt = select(CacheVersion.version).where(CacheVersion.name == name)
+    version = int(db.execute(stmt).scalar() or 0)
+
+    _version_memo.set(name, version)
+    return version
+
+
+def bump_cache_version(db, name):
+    """
+    Increment a cache_versions counter. Call inside the same transaction as the
+    change it guards so the bump and the change commit together.
+    """
+    stmt = (
+        update(CacheVersion)
+        .where(CacheVersion.name == name)
+        .values(version=CacheVersion.version + 1)
+    )
+    result = db.execute(stmt)
+
+    if result.rowcount == 0:
+        db.add(CacheVersion(name=name, version=1))
+        db.flush()
+
+    _version_memo.pop(name)
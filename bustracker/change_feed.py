@@ -0,0 +1,223 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, or_, select
+
+from bustracker.db import get_session
+from bustracker.live import publish_tile_changes
+from bustracker.models.bus_run_change import BusRunChange
+from bustracker.query_guard import untracked
+
+
+logger = logging.getLogger(__name__)
+
+# Most rows read per poll, a burst bigger than this drains over several polls
+POLL_BATCH_SIZE = 500
+
+# An id skipped by the cursor is usually a transaction that took its
+# AUTO_INCREMENT value but committed after a later one. Keep looking for it
+# this long before assuming it rolled back.
+GAP_TIMEOUT_SECONDS = 10
+
+# Gaps tracked at once, a bigger jump is treated as a restart of the feed
+MAX_TRACKED_GAPS = 1000
+
+# When the poller starts, ids missing among this many newest rows may still be
+# open transactions and are tracked as gaps
+PRIME_GAP_WINDOW = 100
+
+# Rows older than this are deleted, clients that were away longer catch up
+# from /bus-runs/<id>/tiles.json instead
+RETENTION_SECONDS = 60 * 60
+PRUNE_INTERVAL_SECONDS = 10 * 60
+
+_poller = None
+_poller_lock = threading.Lock()
+
+
+def record_tile_changes(db, bus_run_id, bus_run_public_id, change_version,
+                        tiles):
+    """
+    Append a change row for every worker to pick up. Call in the same
+    transaction as the change (after bump_run_version) so the row only becomes
+    visible when the change commits.
+    """
+    db.add(BusRunChange(
+        bus_run_id=bus_run_id,
+        bus_run_public_id=str(bus_run_public_id),
+        change_version=int(change_version),
+        payload=json.dumps(tiles),
+    ))
+
+
+def prune_changes(db, retention_seconds=RETENTION_SECONDS):
+    cutoff = (
+        datetime.now(timezone.utc).replace(tzinfo=None)
+        - timedelta(seconds=retention_seconds)
+    )
+    result = db.execute(
+        delete(BusRunChange).where(BusRunChange.created_at_utc < cutoff)
+    )
+    return result.rowcount
+
+
+class ChangeFeedPoller:
+    """
+    One background thread per worker process that reads new bus_run_changes
+    rows and publishes them to the local broadcaster.
+
+    Each poll is a single indexed range read on the primary key, so the cost
+    depends on the poll interval and the write rate, never on how many viewers
+    are connected. The poller starts with the worker's first SSE subscription
+    and then keeps polling even while nobody is subscribed, so the cursor and
+    gap state are always current: a subscriber that arrives later gets every
+    change committed after its page caught up through tiles.json.
+    """
+
+    def __init__(self, interval_seconds):
+        self.interval_seconds = float(interval_seconds)
+        self.pid = os.getpid()
+        self._cursor = None
+        self._gaps = {}
+        self._next_prune = time.monotonic() + PRUNE_INTERVAL_SECONDS
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        # Position the cursor before returning, so the subscriber that started
+        # us (and catches up after subscribing) can't fall between the two
+        try:
+            with untracked():
+                with get_session() as db:
+                    self._prime(db)
+        except Exception:
+            # The first poll tries again
+            logger.exception('bus run change feed prime failed')
+
+        self._thread = threading.Thread(
+            target=self._run,
+            name='bus-run-change-feed',
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.poll_once()
+            except Exception:
+                logger.exception('bus run change feed poll failed')
+
+            if time.monotonic() >= self._next_prune:
+                self._next_prune = time.monotonic() + PRUNE_INTERVAL_SECONDS
+                try:
+                    self.prune_once()
+                except Exception:
+                    logger.exception('bus run change feed prune failed')
+
+    def _prime(self, db):
+        newest = int(
+            db.execute(select(func.max(BusRunChange.id))).scalar() or 0
+        )
+        low = max(newest - PRIME_GAP_WINDOW, 0)
+        present = set(
+            db.execute(
+                select(BusRunChange.id).where(BusRunChange.id > low)
+            ).scalars()
+        )
+
+        deadline = time.monotonic() + GAP_TIMEOUT_SECONDS
+        for missing_id in range(low + 1, newest):
+            if missing_id not in present:
+                self._gaps[missing_id] = deadline
+        self._cursor = newest
+
+    def poll_once(self):
+        with get_session() as db:
+            if self._cursor is None:
+                self._prime(db)
+                return 0
+
+            rows = db.execute(self._poll_stmt()).all()
+
+        for row in rows:
+            self._advance(row.id)
+            publish_tile_changes(
+                row.bus_run_public_id,
+                json.loads(row.payload),
+                row.change_version,
+            )
+
+        self._expire_gaps()
+        return len(rows)
+
+    def prune_once(self):
+        with get_session() as db:
+            deleted = prune_changes(db)
+            db.commit()
+        return deleted
+
+    def _poll_stmt(self):
+        cond = BusRunChange.id > self._cursor
+        if self._gaps:
+            cond = or_(cond, BusRunChange.id.in_(list(self._gaps)))
+
+        return (
+            select(
+                BusRunChange.id,
+                BusRunChange.bus_run_public_id,
+                BusRunChange.change_version,
+                BusRunChange.payload,
+            )
+            .where(cond)
+            .order_by(BusRunChange.id)
+            .limit(POLL_BATCH_SIZE)
+        )
+
+    def _advance(self, row_id):
+        if row_id in self._gaps:
+            del self._gaps[row_id]
+            return
+
+        if row_id <= self._cursor:
+            return
+
+        skipped = row_id - self._cursor - 1
+        if 0 < skipped <= MAX_TRACKED_GAPS - len(self._gaps):
+            deadline = time.monotonic() + GAP_TIMEOUT_SECONDS
+            for missing_id in range(self._cursor + 1, row_id):
+                self._gaps[missing_id] = deadline
+
+        self._cursor = row_id
+
+    def _expire_gaps(self):
+        now = time.monotonic()
+        for gap_id, deadline in list(self._gaps.items()):
+            if deadline <= now:
+                del self._gaps[gap_id]
+
+
+def ensure_change_feed(interval_seconds):
+    """
+    Start this process's poller if it isn't running. Called on the first SSE
+    subscription rather than at import so it also works with gunicorn
+    --preload (threads don't survive the fork into workers).
+    """
+    global _poller
+
+    pid = os.getpid()
+    with _poller_lock:
+        if _poller is not None and _poller.pid == pid:
+            return _poller
+
+        _poller = ChangeFeedPoller(interval_seconds)
+        _poller.start()
+        return _poller
@@ -18,6 +18,36 @@ def _get_env_int(name, default=None, required=True):
         raise ValueError('invalid int for env var: %s = %s' % (name, raw))
 
 
+def _get_env_choice(name, choices, default):
+    raw = _get_env(name, default=default, required=False)
+    val = str(raw).strip().lower()
+    if val not in choices:
+        raise ValueError('invalid value for env var: %s = %s (use %s)' % (
+            name,
+            raw,
+            ', '.join(choices),
+        ))
+    return val
+
+
+def _get_env_list(name, default='', required=False):
+    raw = _get_env(name, default=default, required=required)
+    if raw is None:
+        return []
+    return [p.strip() for p in str(raw).split(',') if p.strip() != '']
+
+
+def _build_mysql_uri(user, password, host, port, name):
+    pw = quote_plus(password)
+    return (
+        'mysql+pymysql://'
+        + user + ':' + pw
+        + '@' + host + ':' + str(port)
+        + '/' + name
+        + '?charset=utf8mb4'
+    )
+
+
 def _join_url(base_url, path):
     base_url = str(base_url).rstrip('/')
     path = str(path).strip()
@@ -27,6 +57,9 @@ def _join_url(base_url, path):
 
 
 class Config:
+    # Default for QUERY_GUARD_MODE, see bustracker.query_guard
+    QUERY_GUARD_DEFAULT_MODE = 'off'
+
     def __init__(self):
         # Flask/App
         self.SECRET_KEY = _get_env('SECRET_KEY')
@@ -48,6 +81,96 @@ class Config:
         self.DB_HOST = _get_env('DB_HOST')
         self.DB_PORT = _get_env_int('DB_PORT')
 
+        # DB read replicas (optional), comma-separated "host" or "host:port"
+        # entries that share the app user/password/database with the primary
+        self.DB_REPLICA_HOSTS = _get_env_list('DB_REPLICA_HOSTS')
+
+        # How long a user's requests stay on the primary after they write, so
+        # they never read their own change back from a lagging replica
+        self.DB_READ_YOUR_WRITES_SECONDS = _get_env_int(
+            'DB_READ_YOUR_WRITES_SECONDS',
+            default=15,
+            required=False,
+        )
+
+        # DB connection pool, sized per gunicorn worker (and per engine when
+        # replicas are configured): size + overflow is the most connections one
+        # worker will hold open, keep workers * that under max_connections
+        self.DB_POOL_SIZE = _get_env_int(
+            'DB_POOL_SIZE',
+            default=5,
+            required=False,
+        )
+        self.DB_POOL_MAX_OVERFLOW = _get_env_int(
+            'DB_POOL_MAX_OVERFLOW',
+            default=10,
+            required=False,
+        )
+        self.DB_POOL_TIMEOUT_SECONDS = _get_env_int(
+            'DB_POOL_TIMEOUT_SECONDS',
+            default=30,
+            required=False,
+        )
+        self.DB_POOL_RECYCLE_SECONDS = _get_env_int(
+            'DB_POOL_RECYCLE_SECONDS',
+            default=300,
+            required=False,
+        )
+
+        # Liveness check on checkout:
+        #   idle: ping only connections idle longer than DB_POOL_PING_IDLE_SECONDS
+        #   always: ping before every checkout
+        #   never: no check (rely on pool_recycle and disconnect invalidation)
+        self.DB_POOL_PRE_PING = _get_env_choice(
+            'DB_POOL_PRE_PING',
+            choices=('idle', 'always', 'never'),
+            default='idle',
+        )
+        self.DB_POOL_PING_IDLE_SECONDS = _get_env_int(
+            'DB_POOL_PING_IDLE_SECONDS',
+            default=30,
+            required=False,
+        )
+
+        # /readyz re-checks the database at most this often per worker
+        self.HEALTH_DB_PROBE_INTERVAL_SECONDS = _get_env_int(
+            'HEALTH_DB_PROBE_INTERVAL_SECONDS',
+            default=5,
+            required=False,
+        )
+
+        # How often each worker checks bus_run_changes for live tile updates.
+        # The poll runs for the life of the worker, subscribers or not, so
+        # expect one small query per worker this often
+        self.CHANGE_FEED_POLL_SECONDS = _get_env_int(
+            'CHANGE_FEED_POLL_SECONDS',
+            default=1,
+            required=False,
+        )
+
+        # Open /events streams per worker. Each holds a worker thread, keep
+        # this below gunicorn's threads (gunicorn.conf.py) so some are left
+        # for ordinary requests; pages over the limit fall back to polling
+        self.SSE_MAX_STREAMS_PER_WORKER = _get_env_int(
+            'SSE_MAX_STREAMS_PER_WORKER',
+            default=24,
+            required=False,
+        )
+
+        # Development N+1 detector: off, warn (log) or raise
+        self.QUERY_GUARD_MODE = _get_env_choice(
+            'QUERY_GUARD_MODE',
+            choices=('off', 'warn', 'raise'),
+            default=self.QUERY_GUARD_DEFAULT_MODE,
+        )
+        # Same normalized statement more than this many times in one request is
+        # flagged as a likely N+1
+        self.QUERY_GUARD_REPEAT_LIMIT = _get_env_int(
+            'QUERY_GUARD_REPEAT_LIMIT',
+            default=5,
+            required=False,
+        )
+
         # DB (used by Alembic for migrations)
         self.MIGRATE_DB_USER = _get_env(
             'MIGRATE_DB_USER',
@@ -66,29 +189,55 @@ class Config:
 
     @property
     def SQLALCHEMY_DATABASE_URI(self):
-        pw = quote_plus(self.DB_PASSWORD)
-        return (
-            'mysql+pymysql://'
-            + self.DB_USER + ':' + pw
-            + '@' + self.DB_HOST + ':' + str(self.DB_PORT)
-            + '/' + self.DB_NAME
-            + '?charset=utf8mb4'
+        return _build_mysql_uri(
+            self.DB_USER,
+            self.DB_PASSWORD,
+            self.DB_HOST,
+            self.DB_PORT,
+            self.DB_NAME,
         )
 
+    @property
+    def DB_POOL_SETTINGS(self):
+        return {
+            'pool_size': self.DB_POOL_SIZE,
+            'max_overflow': self.DB_POOL_MAX_OVERFLOW,
+            'pool_timeout': self.DB_POOL_TIMEOUT_SECONDS,
+            'pool_recycle': self.DB_POOL_RECYCLE_SECONDS,
+            'pre_ping': self.DB_POOL_PRE_PING,
+            'ping_idle_seconds': self.DB_POOL_PING_IDLE_SECONDS,
+        }
+
+    @property
+    def SQLALCHEMY_REPLICA_URIS(self):
+        uris = []
+        for entry in self.DB_REPLICA_HOSTS:
+            host, sep, port = entry.partition(':')
+            if sep and not port.isdigit():
+                raise ValueError('invalid DB_REPLICA_HOSTS entry: %s' % entry)
+
+            uris.append(_build_mysql_uri(
+                self.DB_USER,
+                self.DB_PASSWORD,
+                host,
+                port if sep else self.DB_PORT,
+                self.DB_NAME,
+            ))
+        return uris
+
     @property
     def MIGRATE_DATABASE_URI(self):
-        pw = quote_plus(self.MIGRATE_DB_PASSWORD)
-        return (
-            'mysql+pymysql://'
-            + self.MIGRATE_DB_USER + ':' + pw
-            + '@' + self.DB_HOST + ':' + str(self.DB_PORT)
-            + '/' + self.DB_NAME
-            + '?charset=utf8mb4'
+        return _build_mysql_uri(
+            self.MIGRATE_DB_USER,
+            self.MIGRATE_DB_PASSWORD,
+            self.DB_HOST,
+            self.DB_PORT,
+            self.DB_NAME,
         )
 
 
 class DevConfig(Config):
-    pass
+    QUERY_GUARD_DEFAULT_MODE = 'warn'
 
 
 class ProdConfig(Config):
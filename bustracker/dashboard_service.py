@@ -0,0 +1,109 @@
+from sqlalchemy import select
+
+from bustracker.bus_run_service import format_local_time
+from bustracker.models.bus_run import BusRun
+from bustracker.models.bus_run_rollup import BusRunRollup
+from bustracker.models.run_type import RunType
+from bustracker.models.school_bus import SchoolBus
+from bustracker.timezones import local_now
+
+
+# Dashboard labels for bus_run_rollups.last_event_type
+LAST_EVENT_LABELS = {
+    'check_in': 'Checked in',
+    'record_count': 'Count recorded',
+    'depart': 'Departed',
+    'correction': 'Corrected',
+    'buses_rolling': 'Buses rolling',
+}
+
+
+def _school_today(tz_name):
+    return local_now(tz_name).date()
+
+
+def load_dashboard(db, schools):
+    """
+    Today's runs (each school's own local date) for the given schools, read
+    only from bus_run_rollups: one indexed read per load however many events
+    the runs have accumulated.
+
+    schools are the rows from get_user_allowed_schools(). Returns one dict
+    per school, in the same order, with 'runs' and 'totals'.
+    """
+    today_by_school = {
+        int(s.id): _school_today(str(s.timezone)) for s in schools
+    }
+    if not today_by_school:
+        return []
+
+    stmt = (
+        select(
+            BusRunRollup.school_id,
+            BusRunRollup.run_date,
+            BusRunRollup.waiting_count,
+            BusRunRollup.checked_in_count,
+            BusRunRollup.departed_count,
+            BusRunRollup.last_event_type,
+            BusRunRollup.last_event_at_utc,
+            BusRun.public_id.label('bus_run_public_id'),
+            RunType.display_name.label('run_type_label'),
+            SchoolBus.display_name.label('last_bus_label'),
+        )
+        .join(BusRun, BusRun.id == BusRunRollup.bus_run_id)
+        .join(RunType, RunType.id == BusRun.run_type_id)
+        .outerjoin(
+            SchoolBus,
+            SchoolBus.id == BusRunRollup.last_event_school_bus_id,
+        )
+        .where(BusRunRollup.school_id.in_(list(today_by_school)))
+        .where(BusRunRollup.run_date.in_(set(today_by_school.values())))
+        .where(BusRun.is_active == True)
+        .order_by(RunType.default_after_local_time, RunType.display_name)
+    )
+    rows = db.execute(stmt).all()
+
+    runs_by_school = {}
+    for r in rows:
+        school_id = int(r.school_id)
+        # Dates were matched as a set, keep only the school's own today
+        if r.run_date != today_by_school[school_id]:
+            continue
+        runs_by_school.setdefault(school_id, []).append(r)
+
+    dashboard = []
+    for s in schools:
+        tz_name = str(s.timezone)
+        runs = []
+        totals = {'waiting': 0, 'checked_in': 0, 'departed': 0}
+
+        for r in runs_by_school.get(int(s.id), []):
+            runs.append({
+                'bus_run_public_id': str(r.bus_run_public_id),
+                'run_type_label': str(r.run_type_label),
+                'waiting': int(r.waiting_count),
+                'checked_in': int(r.checked_in_count),
+                'departed': int(r.departed_count),
+                'last_event_label': LAST_EVENT_LABELS.get(
+                    r.last_event_type,
+                    r.last_event_type,
+                ),
+                'last_bus_label': r.last_bus_label,
+                'last_event_time': format_local_time(
+                    r.last_event_at_utc,
+                    tz_name,
+                ),
+            })
+            totals['waiting'] += int(r.waiting_count)
+            totals['checked_in'] += int(r.checked_in_count)
+            totals['departed'] += int(r.departed_count)
+
+        dashboard.append({
+            'short_name': str(s.short_name),
+            'long_name': str(s.long_name),
+            'local_date': today_by_school[int(s.id)],
+            'runs': runs,
+            'totals': totals,
+        })
+
+    return dashboard
@@ -1,22 +1,191 @@
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+import os
+import random
+import threading
+import time
 
+from sqlalchemy import create_engine, event, exc, text
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from bustracker.metrics import Histogram
+
+
+# Used when init_engine() is called without pool settings
+DEFAULT_POOL_SETTINGS = {
+    'pool_size': 5,
+    'max_overflow': 10,
+    'pool_timeout': 30,
+    'pool_recycle': 300,
+    'pre_ping': 'idle',
+    'ping_idle_seconds': 30,
+}
+
+# Seconds spent waiting for a pooled connection
+POOL_WAIT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+    5.0,
+    10.0,
+    30.0,
+)
 
 _engine = None
+_replica_engines = []
 _SessionLocal = None
 
 
-def init_engine(db_uri):
-    global _engine
-    global _SessionLocal
+class PoolStats:
+    """
+    Counters for one engine's pool in this worker process.
+    """
+
+    def __init__(self):
+        # Configured max_overflow, set by _create_engine()
+        self.max_overflow = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.pings_performed = 0
+        self.pings_skipped = 0
+        self.ping_failures = 0
+        self.wait_seconds = Histogram(POOL_WAIT_BUCKETS)
+        self._lock = threading.Lock()
+
+    def record_ping(self, performed, failed=False):
+        with self._lock:
+            if not performed:
+                self.pings_skipped += 1
+                return
+            self.pings_performed += 1
+            if failed:
+                self.ping_failures += 1
+
+    def record_checkout(self, wait_seconds, timed_out=False):
+        self.wait_seconds.observe(wait_seconds)
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that times how long each checkout waits for a connection
+    (including connecting, when the pool has to open a new one).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_checkout(time.perf_counter() - t0, timed_out=True)
+            raise
+
+        self.stats.record_checkout(time.perf_counter() - t0)
+        return conn
+
+    def recreate(self):
+        # Pools are recreated on dispose()/invalidation, keep the counters
+        new_pool = super().recreate()
+        new_pool.stats = self.stats
+        return new_pool
+
+
+def _install_liveness_check(engine, idle_seconds):
+    """
+    Ping a connection on checkout only when it has sat idle in the pool for
+    more than idle_seconds (0 pings every checkout). A failed ping raises
+    DisconnectionError, which makes the pool discard that connection and
+    retry the checkout with a fresh one.
+
+    Only pinged connections get that recovery. One checked in less than
+    idle_seconds ago is handed out unchecked, and if the server dropped it in
+    the meantime the statement fails and the request errors. The pool then
+    invalidates the connection, so the next request gets a fresh one.
+    pool_recycle and a short ping_idle_seconds keep that window small.
+    """
+    pool = engine.pool
 
-    _engine = create_engine(
+    # Listeners on the pool carry over when it is recreated after dispose()
+    @event.listens_for(pool, 'connect')
+    def _on_connect(dbapi_conn, record):
+        record.info['last_checkin'] = time.monotonic()
+
+    @event.listens_for(pool, 'checkin')
+    def _on_checkin(dbapi_conn, record):
+        if dbapi_conn is not None:
+            record.info['last_checkin'] = time.monotonic()
+
+    @event.listens_for(pool, 'checkout')
+    def _on_checkout(dbapi_conn, record, proxy):
+        stats = engine.pool.stats
+
+        last_checkin = record.info.get('last_checkin')
+        idle_for = time.monotonic() - (last_checkin or 0)
+        if last_checkin is not None and idle_for < idle_seconds:
+            stats.record_ping(performed=False)
+            return
+
+        try:
+            engine.dialect.do_ping(dbapi_conn)
+        except Exception:
+            stats.record_ping(performed=True, failed=True)
+            raise exc.DisconnectionError('connection failed liveness ping')
+
+        stats.record_ping(performed=True)
+
+
+def _create_engine(db_uri, pool_settings):
+    engine = create_engine(
         db_uri,
-        pool_pre_ping=True,
-        pool_recycle=300
+        poolclass=InstrumentedQueuePool,
+        pool_size=pool_settings['pool_size'],
+        max_overflow=pool_settings['max_overflow'],
+        pool_timeout=pool_settings['pool_timeout'],
+        pool_recycle=pool_settings['pool_recycle'],
     )
+    engine.pool.stats.max_overflow = pool_settings['max_overflow']
+
+    pre_ping = pool_settings['pre_ping']
+    if pre_ping == 'always':
+        _install_liveness_check(engine, idle_seconds=0)
+    elif pre_ping == 'idle':
+        _install_liveness_check(
+            engine,
+            idle_seconds=pool_settings['ping_idle_seconds'],
+        )
+
+    return engine
+
+
+def init_engine(db_uri, replica_uris=None, pool_settings=None):
+    global _engine
+    global _replica_engines
+    global _SessionLocal
+
+    settings = dict(DEFAULT_POOL_SETTINGS)
+    settings.update(pool_settings or {})
+
+    _engine = _create_engine(db_uri, settings)
+    _replica_engines = [
+        _create_engine(uri, settings) for uri in (replica_uris or [])
+    ]
 
     _SessionLocal = sessionmaker(
+        class_=RoutingSession,
         bind=_engine,
         autoflush=False,
         autocommit=False,
@@ -30,10 +199,196 @@ def get_engine():
     return _engine
 
 
-def get_session():
+def has_replicas():
+    return len(_replica_engines) > 0
+
+
+def get_engines():
+    """
+    Returns [(name, engine), ...] for the primary and every replica.
+    """
+    engines = [('primary', get_engine())]
+    for i, engine in enumerate(_replica_engines):
+        engines.append(('replica_%s' % (i + 1), engine))
+    return engines
+
+
+def get_pool_stats():
+    """
+    Live pool numbers for this worker process, one entry per engine.
+    """
+    engines = {}
+
+    for name, engine in get_engines():
+        pool = engine.pool
+        stats = pool.stats
+
+        engines[name] = {
+            'size': pool.size(),
+            'max_overflow': stats.max_overflow,
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0),
+            'checkouts_total': stats.checkouts,
+            'timeouts_total': stats.timeouts,
+            'pings_performed_total': stats.pings_performed,
+            'pings_skipped_total': stats.pings_skipped,
+            'ping_failures_total': stats.ping_failures,
+            'checkout_wait_seconds': stats.wait_seconds.snapshot(),
+        }
+
+    return {'pid': os.getpid(), 'engines': engines}
+
+
+def get_session(use_primary=True):
     if _SessionLocal is None:
         raise RuntimeError('db engine not initialized')
-    return _SessionLocal()
+    return _SessionLocal(use_primary=use_primary)
+
+
+def primary_db(fn):
+    """
+    Mark a view as needing the primary even for GET requests (for example a
+    GET that reads and then writes, like the OAuth callback).
+    """
+    fn.use_primary_db = True
+    return fn
+
+
+def dialect_insert(table):
+    """
+    INSERT construct for the primary's dialect, so callers can chain the
+    conflict helpers below (MySQL in production, SQLite in tests).
+    """
+    name = get_engine().dialect.name
+    if name == 'mysql':
+        return mysql_insert(table)
+    if name == 'sqlite':
+        return sqlite_insert(table)
+    raise RuntimeError('no upsert support for dialect: %s' % name)
+
+
+def on_conflict_update(stmt, key_columns, values):
+    """
+    INSERT ... ON DUPLICATE KEY UPDATE / ON CONFLICT (key_columns) DO UPDATE.
+    key_columns must match a unique key (only SQLite needs them).
+    """
+    if get_engine().dialect.name == 'mysql':
+        return stmt.on_duplicate_key_update(**values)
+    return stmt.on_conflict_do_update(index_elements=key_columns, set_=values)
+
+
+def on_conflict_ignore(stmt, key_columns):
+    """
+    Skip rows that hit the key_columns unique key. On MySQL this is a no-op
+    ON DUPLICATE KEY UPDATE rather than INSERT IGNORE, which would also hide
+    foreign key and truncation errors.
+    """
+    if get_engine().dialect.name == 'mysql':
+        col = stmt.table.c[key_columns[0]]
+        return stmt.on_duplicate_key_update(**{key_columns[0]: col})
+    return stmt.on_conflict_do_nothing(index_elements=key_columns)
+
+
+def _is_write_clause(clause):
+    if clause is None:
+        return False
+    if getattr(clause, 'is_dml', False):
+        return True
+    # SELECT ... FOR UPDATE must lock rows on the primary
+    return getattr(clause, '_for_update_arg', None) is not None
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to a replica when it was opened with
+    use_primary=False and replicas are configured.
+
+    Flushes, INSERT/UPDATE/DELETE statements and locking reads always go to the
+    primary, and once the session has written, every later statement in it does
+    too.
+    """
+
+    def __init__(self, *args, use_primary=True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.use_primary = use_primary
+        self.did_write = False
+        self._replica = None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or _is_write_clause(clause):
+            self.did_write = True
+            self.use_primary = True
+
+        if self.use_primary or not _replica_engines:
+            return super().get_bind(mapper, clause=clause, **kw)
+
+        # Stick to one replica for the life of the session so reads within a
+        # request see a single consistent snapshot
+        if self._replica is None:
+            self._replica = random.choice(_replica_engines)
+        return self._replica
+
+
+class LazySession:
+    """
+    Request-scoped stand-in for a Session.
+
+    The real Session is only created the first time something on it is used
+    (execute, get, add, ...), so requests that never need the database never
+    check out a pooled connection.
+
+    use_primary_fn is called at that point to decide whether reads may go to a
+    replica; when omitted the session always uses the primary.
+    """
+
+    def __init__(self, use_primary_fn=None):
+        self._session = None
+        self._use_primary_fn = use_primary_fn
+
+    @property
+    def is_started(self):
+        return self._session is not None
+
+    @property
+    def did_write(self):
+        return self._session is not None and self._session.did_write
+
+    def _get(self):
+        if self._session is None:
+            use_primary = True
+            if self._use_primary_fn is not None and has_replicas():
+                use_primary = bool(self._use_primary_fn())
+            self._session = get_session(use_primary=use_primary)
+        return self._session
+
+    def __getattr__(self, name):
+        # Only called for attributes not found on LazySession itself
+        return getattr(self._get(), name)
+
+    def finish(self, exc=None):
+        """
+        End the request: commit on success, rollback on error, then close.
+        Skips the COMMIT/ROLLBACK round-trip entirely when the session was never
+        created or never began a transaction.
+        """
+        db = self._session
+        if db is None:
+            return
+
+        self._session = None
+
+        try:
+            has_pending = bool(db.new or db.dirty or db.deleted)
+            if not db.in_transaction() and not has_pending:
+                return
+
+            if exc is None:
+                db.commit()
+            else:
+                db.rollback()
+        finally:
+            db.close()
 
 
 def ping_db():
@@ -0,0 +1,86 @@
+import threading
+import time
+
+from bustracker.db import get_pool_stats, ping_db
+
+
+class ReadinessProbe:
+    """
+    Cached readiness check for load balancer probes.
+
+    The DB ping runs at most once per interval_seconds per worker, no matter how
+    many balancers are probing. While one request refreshes the result, the
+    others keep answering from the previous one instead of queueing behind it.
+
+    Readiness is DB reachability only. A saturated pool is reported in the
+    details (and in /metrics) but doesn't fail the probe: under load every
+    instance saturates together, and pulling them all out of the balancer
+    would turn a slowdown into an outage.
+    """
+
+    def __init__(self, interval_seconds):
+        self.interval_seconds = float(interval_seconds)
+        self._db_ok = None
+        self._db_error = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def _refresh_db(self):
+        try:
+            ping_db()
+            self._db_ok = True
+            self._db_error = None
+        except Exception as e:
+            self._db_ok = False
+            self._db_error = e.__class__.__name__
+        self._checked_at = time.monotonic()
+
+    def _get_db_status(self, pool_saturated):
+        now = time.monotonic()
+        is_stale = (
+            self._checked_at is None
+            or now - self._checked_at >= self.interval_seconds
+        )
+
+        # A saturated pool would make the ping wait for a connection, keep the
+        # last result instead
+        if is_stale and not pool_saturated:
+            # Only the very first check waits for the lock
+            if self._lock.acquire(blocking=self._checked_at is None):
+                try:
+                    self._refresh_db()
+                finally:
+                    self._lock.release()
+
+        age = None
+        if self._checked_at is not None:
+            age = round(time.monotonic() - self._checked_at, 3)
+
+        return {
+            'ok': bool(self._db_ok),
+            'error': self._db_error,
+            'checked_seconds_ago': age,
+        }
+
+    def check(self):
+        """
+        Returns: (is_ready, details_dict)
+        """
+        primary = get_pool_stats()['engines']['primary']
+        capacity = primary['size'] + primary['max_overflow']
+        pool_saturated = primary['checked_out'] >= capacity
+
+        db_status = self._get_db_status(pool_saturated)
+
+        is_ready = db_status['ok']
+        details = {
+            'status': 'ready' if is_ready else 'not ready',
+            'db': db_status,
+            'pool': {
+                'checked_out': primary['checked_out'],
+                'capacity': capacity,
+                'saturated': pool_saturated,
+                'timeouts_total': primary['timeouts_total'],
+            },
+        }
+        return is_ready, details
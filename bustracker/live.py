@@ -0,0 +1,153 @@
+import json
+import queue
+import threading
+import time
+
+
+# SSE comment sent when nothing happened, keeps proxies from closing the stream
+HEARTBEAT_SECONDS = 15
+
+# Streams are closed after this long so worker threads get recycled, the
+# browser's EventSource reconnects on its own
+MAX_STREAM_SECONDS = 30 * 60
+
+# Pending events per subscriber before it is told to resync instead
+MAX_QUEUED_EVENTS = 100
+
+# Default cap on open streams per worker, see SSE_MAX_STREAMS_PER_WORKER
+MAX_STREAMS = 24
+
+
+class TooManyStreams(RuntimeError):
+    pass
+
+
+class RunBroadcaster:
+    """
+    In-process fan-out of bus run tile changes to SSE subscribers.
+
+    Subscribers block on their own queue, so an idle viewer costs a sleeping
+    thread and nothing else: no DB polling, no CPU. That thread is a worker
+    thread for as long as the stream is open, so max_subscribers keeps enough
+    of them free for ordinary requests.
+    """
+
+    def __init__(self, max_queued_events=MAX_QUEUED_EVENTS,
+                 max_subscribers=MAX_STREAMS):
+        self.max_queued_events = int(max_queued_events)
+        self.max_subscribers = int(max_subscribers)
+        self._subscribers = {}
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, run_key):
+        """
+        Raises TooManyStreams when this worker already has max_subscribers.
+        """
+        q = queue.Queue(maxsize=self.max_queued_events)
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                raise TooManyStreams(
+                    '%s streams open in this worker' % self._count
+                )
+            self._subscribers.setdefault(run_key, set()).add(q)
+            self._count += 1
+        return q
+
+    def unsubscribe(self, run_key, q):
+        with self._lock:
+            subs = self._subscribers.get(run_key)
+            if subs is None or q not in subs:
+                return
+            subs.discard(q)
+            self._count -= 1
+            if not subs:
+                del self._subscribers[run_key]
+
+    def subscriber_count(self):
+        with self._lock:
+            return self._count
+
+    def publish(self, run_key, event_name, data):
+        """
+        Queue (event_name, data) for every subscriber of run_key. A subscriber
+        that has fallen too far behind gets its backlog replaced by a single
+        'resync' event (the page reloads).
+        """
+        with self._lock:
+            subs = list(self._subscribers.get(run_key, ()))
+
+        for q in subs:
+            try:
+                q.put_nowait((event_name, data))
+            except queue.Full:
+                with q.mutex:
+                    q.queue.clear()
+                q.put_nowait(('resync', {}))
+
+
+broadcaster = RunBroadcaster()
+
+
+def publish_tile_changes(bus_run_public_id, tiles, change_version):
+    """
+    Push changed tiles (same dicts as load_bus_run_view()['tiles']) to everyone
+    watching the run in this worker. change_version is the run's version after
+    the change, sent as the event id and as the tiles.json cursor.
+    """
+    broadcaster.publish(str(bus_run_public_id), 'tiles', {
+        'cursor': int(change_version),
+        'tiles': tiles,
+    })
+
+
+def _format_sse(event_name, data):
+    lines = []
+    if data.get('cursor') is not None:
+        lines.append('id: %s' % data['cursor'])
+    lines.append('event: %s' % event_name)
+    lines.append('data: %s' % json.dumps(data))
+    return '\n'.join(lines) + '\n\n'
+
+
+class RunEventStream:
+    """
+    Iterable text/event-stream body for one viewer. Subscribes right away (not
+    on first iteration) so nothing published after the view returns is
+    missed, and unsubscribes in close(), which the WSGI server calls even
+    when the body is never iterated (HEAD requests, clients that hang up
+    before the first byte).
+    """
+
+    def __init__(self, run_key):
+        self.run_key = run_key
+        self._q = broadcaster.subscribe(run_key)
+
+    def __iter__(self):
+        deadline = time.monotonic() + MAX_STREAM_SECONDS
+        try:
+            # Reconnect delay for EventSource, in milliseconds
+            yield 'retry: 3000\n\n'
+
+            while time.monotonic() < deadline:
+                try:
+                    event_name, data = self._q.get(timeout=HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+
+                yield _format_sse(event_name, data)
+        finally:
+            self.close()
+
+    def close(self):
+        # Safe to call more than once
+        broadcaster.unsubscribe(self.run_key, self._q)
+
+
+def stream_run_events(bus_run_public_id):
+    """
+    Body for a text/event-stream response, see RunEventStream. Raises
+    TooManyStreams when the worker is at its stream limit.
+    """
+    return RunEventStream(str(bus_run_public_id))
@@ -0,0 +1,352 @@
+import os
+import threading
+import time
+
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+
+# Seconds, suited to request and DB latencies
+DEFAULT_LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class Histogram:
+    """
+    Thread-safe fixed-bucket histogram (Prometheus style: bucket counts are
+    reported cumulatively, each bucket counts values <= its upper bound).
+    """
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        # One extra slot for values above the largest bucket (+Inf)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self.buckets, value)
+
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self):
+        """
+        Returns:
+          {'buckets': [(upper_bound, cumulative_count), ...], 'sum', 'count'}
+        The last bucket's upper bound is float('inf').
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+            count = self._count
+
+        buckets = []
+        running = 0
+        for upper, n in zip(self.buckets + (float('inf'),), counts):
+            running += n
+            buckets.append((upper, running))
+
+        return {'buckets': buckets, 'sum': total, 'count': count}
+
+
+# Statements per request
+STATEMENT_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class RequestStats:
+    """
+    DB work done while handling one request, filled in by the engine hooks.
+    """
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+
+
+_current_request_stats = ContextVar('bustracker_request_stats', default=None)
+
+
+def start_request_stats():
+    """
+    Begin collecting DB stats for the current request.
+    Returns a token for finish_request_stats().
+    """
+    return _current_request_stats.set(RequestStats())
+
+
+def finish_request_stats(token):
+    stats = _current_request_stats.get()
+    _current_request_stats.reset(token)
+    return stats
+
+
+def install_engine_hooks(engine):
+    """
+    Count statements and time spent in the database for whatever request is
+    running on this thread. Statements outside a request are ignored.
+    """
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before_cursor_execute(conn, cursor, statement, params, context, many):
+        conn.info.setdefault('bustracker_query_start', []).append(
+            time.perf_counter()
+        )
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after_cursor_execute(conn, cursor, statement, params, context, many):
+        started = conn.info['bustracker_query_start'].pop()
+
+        stats = _current_request_stats.get()
+        if stats is None:
+            return
+
+        stats.statements += 1
+        stats.db_seconds += time.perf_counter() - started
+
+    @event.listens_for(engine, 'handle_error')
+    def _handle_error(context):
+        # after_cursor_execute never fires for a failed statement
+        conn = context.connection
+        if conn is not None and conn.info.get('bustracker_query_start'):
+            conn.info['bustracker_query_start'].pop()
+
+
+def _escape_label(val):
+    return (
+        str(val)
+        .replace('\\', '\\\\')
+        .replace('"', '\\"')
+        .replace('\n', '\\n')
+    )
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    parts = ['%s="%s"' % (k, _escape_label(v)) for k, v in labels]
+    return '{' + ','.join(parts) + '}'
+
+
+def _format_le(upper):
+    if upper == float('inf'):
+        return '+Inf'
+    return repr(float(upper))
+
+
+class MetricsRegistry:
+    """
+    Per-worker request metrics rendered in Prometheus text format.
+
+    Every series carries a pid label: each gunicorn worker keeps its own
+    numbers, and a scrape through the load balancer reaches one worker at a time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._request_seconds = {}
+        self._requests_total = {}
+        self._db_statements = {}
+        self._db_seconds = {}
+
+    def _get_histogram(self, store, key, buckets):
+        hist = store.get(key)
+        if hist is None:
+            with self._lock:
+                hist = store.get(key)
+                if hist is None:
+                    hist = Histogram(buckets)
+                    store[key] = hist
+        return hist
+
+    def observe_request(self, endpoint, method, status, seconds, stats=None):
+        key = (endpoint, method)
+
+        self._get_histogram(
+            self._request_seconds,
+            key,
+            DEFAULT_LATENCY_BUCKETS,
+        ).observe(seconds)
+
+        with self._lock:
+            count_key = (endpoint, method, str(status))
+            self._requests_total[count_key] = (
+                self._requests_total.get(count_key, 0) + 1
+            )
+
+        if stats is not None:
+            self._get_histogram(
+                self._db_statements,
+                key,
+                STATEMENT_COUNT_BUCKETS,
+            ).observe(stats.statements)
+            self._get_histogram(
+                self._db_seconds,
+                key,
+                DEFAULT_LATENCY_BUCKETS,
+            ).observe(stats.db_seconds)
+
+    def _render_histograms(self, lines, name, help_text, store, base_labels):
+        lines.append('# HELP %s %s' % (name, help_text))
+        lines.append('# TYPE %s histogram' % name)
+
+        with self._lock:
+            items = sorted(store.items())
+
+        for (endpoint, method), hist in items:
+            labels = base_labels + [('endpoint', endpoint), ('method', method)]
+            snap = hist.snapshot()
+
+            for upper, count in snap['buckets']:
+                bucket_labels = labels + [('le', _format_le(upper))]
+                lines.append('%s_bucket%s %s' % (
+                    name,
+                    _format_labels(bucket_labels),
+                    count,
+                ))
+            lines.append('%s_sum%s %r' % (
+                name,
+                _format_labels(labels),
+                snap['sum'],
+            ))
+            lines.append('%s_count%s %s' % (
+                name,
+                _format_labels(labels),
+                snap['count'],
+            ))
+
+    def _render_pool(self, lines, pool_stats, base_labels):
+        gauges = [
+            ('size', 'gauge', 'Configured pool size'),
+            ('checked_out', 'gauge', 'Connections currently checked out'),
+            ('checked_in', 'gauge', 'Idle connections in the pool'),
+            ('overflow', 'gauge', 'Connections open beyond pool size'),
+            ('checkouts_total', 'counter', 'Successful pool checkouts'),
+            ('timeouts_total', 'counter', 'Checkouts that hit pool_timeout'),
+            ('pings_performed_total', 'counter', 'Liveness pings sent'),
+            ('pings_skipped_total', 'counter', 'Liveness pings skipped'),
+            ('ping_failures_total', 'counter', 'Liveness pings that failed'),
+        ]
+
+        engines = sorted(pool_stats['engines'].items())
+
+        for key, metric_type, help_text in gauges:
+            name = 'bustracker_db_pool_' + key
+            lines.append('# HELP %s %s' % (name, help_text))
+            lines.append('# TYPE %s %s' % (name, metric_type))
+            for engine_name, vals in engines:
+                labels = base_labels + [('engine', engine_name)]
+                lines.append('%s%s %s' % (
+                    name,
+                    _format_labels(labels),
+                    vals[key],
+                ))
+
+        name = 'bustracker_db_pool_saturated'
+        lines.append('# HELP %s 1 when every pooled connection is checked out' % name)
+        lines.append('# TYPE %s gauge' % name)
+        for engine_name, vals in engines:
+            labels = base_labels + [('engine', engine_name)]
+            capacity = vals['size'] + vals['max_overflow']
+            lines.append('%s%s %s' % (
+                name,
+                _format_labels(labels),
+                1 if vals['checked_out'] >= capacity else 0,
+            ))
+
+        name = 'bustracker_db_pool_checkout_wait_seconds'
+        lines.append('# HELP %s Time spent waiting for a pooled connection' % name)
+        lines.append('# TYPE %s histogram' % name)
+        for engine_name, vals in engines:
+            labels = base_labels + [('engine', engine_name)]
+            snap = vals['checkout_wait_seconds']
+            for upper, count in snap['buckets']:
+                bucket_labels = labels + [('le', _format_le(upper))]
+                lines.append('%s_bucket%s %s' % (
+                    name,
+                    _format_labels(bucket_labels),
+                    count,
+                ))
+            lines.append('%s_sum%s %r' % (
+                name,
+                _format_labels(labels),
+                snap['sum'],
+            ))
+            lines.append('%s_count%s %s' % (
+                name,
+                _format_labels(labels),
+                snap['count'],
+            ))
+
+    def render_prometheus(self, pool_stats=None, sse_streams=None):
+        base_labels = [('pid', os.getpid())]
+        lines = []
+
+        self._render_histograms(
+            lines,
+            'bustracker_http_request_duration_seconds',
+            'Request latency by endpoint',
+            self._request_seconds,
+            base_labels,
+        )
+
+        name = 'bustracker_http_requests_total'
+        lines.append('# HELP %s Requests by endpoint and status' % name)
+        lines.append('# TYPE %s counter' % name)
+        with self._lock:
+            totals = sorted(self._requests_total.items())
+        for (endpoint, method, status), count in totals:
+            labels = base_labels + [
+                ('endpoint', endpoint),
+                ('method', method),
+                ('status', status),
+            ]
+            lines.append('%s%s %s' % (name, _format_labels(labels), count))
+
+        self._render_histograms(
+            lines,
+            'bustracker_db_statements_per_request',
+            'SQL statements executed per request',
+            self._db_statements,
+            base_labels,
+        )
+        self._render_histograms(
+            lines,
+            'bustracker_db_seconds_per_request',
+            'Time spent in SQL statements per request',
+            self._db_seconds,
+            base_labels,
+        )
+
+        if pool_stats is not None:
+            self._render_pool(lines, pool_stats, base_labels)
+
+        if sse_streams is not None:
+            name = 'bustracker_sse_streams_open'
+            lines.append('# HELP %s Open /events streams in this worker' % name)
+            lines.append('# TYPE %s gauge' % name)
+            lines.append('%s%s %s' % (
+                name,
+                _format_labels(base_labels),
+                sse_streams,
+            ))
+
+        return '\n'.join(lines) + '\n'
@@ -1,4 +1,10 @@
 from bustracker.models.bus import Bus
+from bustracker.models.bus_run import BusRun
+from bustracker.models.bus_run_change import BusRunChange
+from bustracker.models.bus_run_rollup import BusRunRollup
+from bustracker.models.bus_run_status import BusRunStatus
+from bustracker.models.bus_run_status_event import BusRunStatusEvent
+from bustracker.models.cache_version import CacheVersion
 from bustracker.models.run_type import RunType
 from bustracker.models.school import School
 from bustracker.models.school_bus import SchoolBus
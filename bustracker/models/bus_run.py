@@ -0,0 +1,94 @@
+import uuid
+
+from sqlalchemy import BigInteger
+from sqlalchemy import Boolean
+from sqlalchemy import Column
+from sqlalchemy import Date
+from sqlalchemy import DateTime
+from sqlalchemy import ForeignKey
+from sqlalchemy import String
+from sqlalchemy import UniqueConstraint
+from sqlalchemy import text
+
+from bustracker.models.base import Base
+
+
+class BusRun(Base):
+    __tablename__ = 'bus_runs'
+
+    __table_args__ = (
+        # One run per school, day and run type: POST /bus-runs finds or
+        # creates it with a single upsert on this key
+        UniqueConstraint(
+            'school_id',
+            'run_date',
+            'run_type_id',
+            name='uq_bus_runs_school_date_type',
+        ),
+    )
+
+    id = Column(
+        BigInteger,
+        primary_key=True,
+        autoincrement=True,
+        nullable=False,
+    )
+
+    # Used in /bus-runs/<public_id> URLs
+    public_id = Column(
+        String(36),
+        nullable=False,
+        unique=True,
+        default=lambda: str(uuid.uuid4()),
+    )
+
+    school_id = Column(
+        BigInteger,
+        ForeignKey('schools.id'),
+        nullable=False,
+    )
+
+    # School-local date of the run
+    run_date = Column(
+        Date,
+        nullable=False,
+    )
+
+    run_type_id = Column(
+        BigInteger,
+        ForeignKey('run_types.id'),
+        nullable=False,
+    )
+
+    created_by_user_id = Column(
+        BigInteger,
+        ForeignKey('users.id'),
+        nullable=True,
+    )
+
+    # 0 = soft deleted from the edit page
+    is_active = Column(
+        Boolean,
+        nullable=False,
+        server_default=text('1'),
+    )
+
+    # Bumped by every write to the run's tiles, bus_run_statuses.change_version
+    # records the value each tile was last changed at (delta cursor)
+    change_version = Column(
+        BigInteger,
+        nullable=False,
+        server_default=text('0'),
+    )
+
+    created_at_utc = Column(
+        DateTime,
+        nullable=False,
+        server_default=text('CURRENT_TIMESTAMP'),
+    )
+
+    updated_at_utc = Column(
+        DateTime,
+        nullable=False,
+        server_default=text('CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP'),
+    )
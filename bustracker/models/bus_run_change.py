@@ -0,0 +1,62 @@
+from sqlalchemy import BigInteger
+from sqlalchemy import Column
+from sqlalchemy import DateTime
+from sqlalchemy import ForeignKey
+from sqlalchemy import Index
+from sqlalchemy import String
+from sqlalchemy import Text
+from sqlalchemy import text
+
+from bustracker.models.base import Base
+
+
+# Append-only feed of tile changes. Every worker on every host reads it with
+# id as a cursor (bustracker.change_feed) and fans rows out to its own SSE
+# subscribers. Rows are only needed for a short while and get pruned.
+class BusRunChange(Base):
+    __tablename__ = 'bus_run_changes'
+
+    __table_args__ = (
+        # Pruning old rows
+        Index(
+            'ix_bus_run_changes_created_at_utc',
+            'created_at_utc',
+        ),
+    )
+
+    id = Column(
+        BigInteger,
+        primary_key=True,
+        autoincrement=True,
+        nullable=False,
+    )
+
+    bus_run_id = Column(
+        BigInteger,
+        ForeignKey('bus_runs.id'),
+        nullable=False,
+    )
+
+    # Copied from bus_runs so the poller never has to join
+    bus_run_public_id = Column(
+        String(36),
+        nullable=False,
+    )
+
+    # bus_runs.change_version after this change
+    change_version = Column(
+        BigInteger,
+        nullable=False,
+    )
+
+    # JSON list of changed tiles (load_bus_run_view()['tiles'] dicts)
+    payload = Column(
+        Text,
+        nullable=False,
+    )
+
+    created_at_utc = Column(
+        DateTime,
+        nullable=False,
+        server_default=text('CURRENT_TIMESTAMP'),
+    )
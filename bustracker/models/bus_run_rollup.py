@@ -0,0 +1,99 @@
+from sqlalchemy import BigInteger
+from sqlalchemy import Column
+from sqlalchemy import Date
+from sqlalchemy import DateTime
+from sqlalchemy import ForeignKey
+from sqlalchemy import Index
+from sqlalchemy import Integer
+from sqlalchemy import String
+from sqlalchemy import text
+
+from bustracker.models.base import Base
+
+
+# Per-run tile counts and latest event for the dashboard, kept up to date by
+# every write to bus_run_statuses (bustracker.rollup_service) so the
+# dashboard never aggregates status rows or the event log.
+class BusRunRollup(Base):
+    __tablename__ = 'bus_run_rollups'
+
+    __table_args__ = (
+        # Dashboard: today's runs for a user's schools
+        Index(
+            'ix_bus_run_rollups_school_date',
+            'school_id',
+            'run_date',
+        ),
+    )
+
+    id = Column(
+        BigInteger,
+        primary_key=True,
+        autoincrement=True,
+        nullable=False,
+    )
+
+    bus_run_id = Column(
+        BigInteger,
+        ForeignKey('bus_runs.id'),
+        nullable=False,
+        unique=True,
+    )
+
+    # Copied from bus_runs for the dashboard index
+    school_id = Column(
+        BigInteger,
+        ForeignKey('schools.id'),
+        nullable=False,
+    )
+
+    run_date = Column(
+        Date,
+        nullable=False,
+    )
+
+    waiting_count = Column(
+        Integer,
+        nullable=False,
+        server_default=text('0'),
+    )
+
+    checked_in_count = Column(
+        Integer,
+        nullable=False,
+        server_default=text('0'),
+    )
+
+    departed_count = Column(
+        Integer,
+        nullable=False,
+        server_default=text('0'),
+    )
+
+    last_event_type = Column(
+        String(32),
+        nullable=True,
+    )
+
+    last_event_school_bus_id = Column(
+        BigInteger,
+        ForeignKey('school_buses.id'),
+        nullable=True,
+    )
+
+    last_event_at_utc = Column(
+        DateTime,
+        nullable=True,
+    )
+
+    created_at_utc = Column(
+        DateTime,
+        nullable=False,
+        server_default=text('CURRENT_TIMESTAMP'),
+    )
+
+    updated_at_utc = Column(
+        DateTime,
+        nullable=False,
+        server_default=text('CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP'),
+    )
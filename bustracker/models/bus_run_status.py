@@ -0,0 +1,101 @@
+from sqlalchemy import BigInteger
+from sqlalchemy import Column
+from sqlalchemy import DateTime
+from sqlalchemy import ForeignKey
+from sqlalchemy import Index
+from sqlalchemy import Integer
+from sqlalchemy import UniqueConstraint
+from sqlalchemy import text
+
+from bustracker.models.base import Base
+
+
+# Current state of one bus (tile) in one bus run. No public_id, rows are always
+# addressed by (bus_run_id, school_bus_id).
+class BusRunStatus(Base):
+    __tablename__ = 'bus_run_statuses'
+
+    __table_args__ = (
+        UniqueConstraint(
+            'bus_run_id',
+            'school_bus_id',
+            name='uq_bus_run_statuses_run_bus',
+        ),
+        # Covers the tile grid query so it reads only this index for a run,
+        # then school_buses/status_types by primary key
+        Index(
+            'ix_bus_run_statuses_run_tile',
+            'bus_run_id',
+            'school_bus_id',
+            'status_type_id',
+            'check_in_at_utc',
+            'student_count',
+            'departure_at_utc',
+        ),
+        # Tiles changed since a client's cursor (/bus-runs/<id>/tiles.json)
+        Index(
+            'ix_bus_run_statuses_run_version',
+            'bus_run_id',
+            'change_version',
+        ),
+    )
+
+    id = Column(
+        BigInteger,
+        primary_key=True,
+        autoincrement=True,
+        nullable=False,
+    )
+
+    bus_run_id = Column(
+        BigInteger,
+        ForeignKey('bus_runs.id'),
+        nullable=False,
+    )
+
+    school_bus_id = Column(
+        BigInteger,
+        ForeignKey('school_buses.id'),
+        nullable=False,
+    )
+
+    # NULL until the first status event (shown as "Waiting")
+    status_type_id = Column(
+        BigInteger,
+        ForeignKey('status_types.id'),
+        nullable=True,
+    )
+
+    check_in_at_utc = Column(
+        DateTime,
+        nullable=True,
+    )
+
+    student_count = Column(
+        Integer,
+        nullable=True,
+    )
+
+    departure_at_utc = Column(
+        DateTime,
+        nullable=True,
+    )
+
+    # bus_runs.change_version as of this tile's last change
+    change_version = Column(
+        BigInteger,
+        nullable=False,
+        server_default=text('0'),
+    )
+
+    created_at_utc = Column(
+        DateTime,
+        nullable=False,
+        server_default=text('CURRENT_TIMESTAMP'),
+    )
+
+    updated_at_utc = Column(
+        DateTime,
+        nullable=False,
+        server_default=text('CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP'),
+    )
@@ -0,0 +1,102 @@
+from sqlalchemy import BigInteger
+from sqlalchemy import Column
+from sqlalchemy import DateTime
+from sqlalchemy import ForeignKey
+from sqlalchemy import Index
+from sqlalchemy import Integer
+from sqlalchemy import String
+from sqlalchemy import UniqueConstraint
+from sqlalchemy import text
+
+from bustracker.models.base import Base
+
+
+# Append-only log of everything done to bus run tiles: check-ins, counts,
+# departures and corrections. bus_run_statuses holds the resulting current
+# state and is what tile pages read, this table is for history/reporting.
+class BusRunStatusEvent(Base):
+    __tablename__ = 'bus_run_status_events'
+
+    __table_args__ = (
+        # Retried submissions carry the same key and are skipped
+        UniqueConstraint(
+            'bus_run_id',
+            'client_event_key',
+            name='uq_bus_run_status_events_run_key',
+        ),
+        # One tile's history in order (rebuilding it after a correction)
+        Index(
+            'ix_bus_run_status_events_history',
+            'bus_run_id',
+            'school_bus_id',
+            'id',
+        ),
+    )
+
+    id = Column(
+        BigInteger,
+        primary_key=True,
+        autoincrement=True,
+        nullable=False,
+    )
+
+    bus_run_id = Column(
+        BigInteger,
+        ForeignKey('bus_runs.id'),
+        nullable=False,
+    )
+
+    school_bus_id = Column(
+        BigInteger,
+        ForeignKey('school_buses.id'),
+        nullable=False,
+    )
+
+    # check_in, record_count, depart or correction
+    event_type = Column(
+        String(32),
+        nullable=False,
+    )
+
+    # Status the tile was left in by this event (NULL for corrections)
+    status_type_id = Column(
+        BigInteger,
+        ForeignKey('status_types.id'),
+        nullable=True,
+    )
+
+    # Only for record_count
+    student_count = Column(
+        Integer,
+        nullable=True,
+    )
+
+    # Generated by the browser once per click
+    client_event_key = Column(
+        String(64),
+        nullable=False,
+    )
+
+    # Event voided by this correction
+    corrects_event_id = Column(
+        BigInteger,
+        ForeignKey('bus_run_status_events.id'),
+        nullable=True,
+    )
+
+    created_by_user_id = Column(
+        BigInteger,
+        ForeignKey('users.id'),
+        nullable=True,
+    )
+
+    occurred_at_utc = Column(
+        DateTime,
+        nullable=False,
+    )
+
+    created_at_utc = Column(
+        DateTime,
+        nullable=False,
+        server_default=text('CURRENT_TIMESTAMP'),
+    )
@@ -0,0 +1,45 @@
+from sqlalchemy import BigInteger
+from sqlalchemy import Column
+from sqlalchemy import DateTime
+from sqlalchemy import String
+from sqlalchemy import text
+
+from bustracker.models.base import Base
+
+
+class CacheVersion(Base):
+    __tablename__ = 'cache_versions'
+
+    id = Column(
+        BigInteger,
+        primary_key=True,
+        autoincrement=True,
+        nullable=False,
+    )
+
+    # Which cached data set this counter guards, like "user_schools"
+    name = Column(
+        String(64),
+        nullable=False,
+        unique=True,
+    )
+
+    # Bumped in the same transaction as any change to the guarded tables so
+    # every worker (and every host) knows its cached copy is stale
+    version = Column(
+        BigInteger,
+        nullable=False,
+        server_default=text('0'),
+    )
+
+    created_at_utc = Column(
+        DateTime,
+        nullable=False,
+        server_default=text('CURRENT_TIMESTAMP'),
+    )
+
+    updated_at_utc = Column(
+        DateTime,
+        nullable=False,
+        server_default=text('CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP'),
+    )
@@ -3,6 +3,7 @@ import uuid
 from sqlalchemy import BigInteger
 from sqlalchemy import Boolean
 from sqlalchemy import Column
+from sqlalchemy import Computed
 from sqlalchemy import DateTime
 from sqlalchemy import String
 from sqlalchemy import UniqueConstraint
@@ -20,6 +21,10 @@ class User(Base):
             'external_id',
             name='uq_users_external_system_id'
         ),
+        UniqueConstraint(
+            'email_normalized',
+            name='uq_users_email_normalized'
+        ),
     )
 
     id = Column(
@@ -55,6 +60,17 @@ class User(Base):
         unique=True
     )
 
+    # Lowercased copy of email kept by the database (stored generated column),
+    # look users up by this so the unique index can be used instead of
+    # scanning with LOWER(email). Trimming happens in Python before email is
+    # written (_norm_email, the seed script): SQL TRIM only strips spaces, so
+    # doing it here would disagree with Python's strip()
+    email_normalized = Column(
+        String(320),
+        Computed('LOWER(email)', persisted=True),
+        nullable=False
+    )
+
     google_sub = Column(
         String(255),
         nullable=True,
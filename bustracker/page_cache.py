@@ -0,0 +1,43 @@
+import hashlib
+import os
+
+from flask import Response
+
+
+def template_fingerprint(template_dir):
+    """
+    Hash of every template's path and contents. Goes into page ETags so a
+    deploy that changes markup invalidates pages browsers already hold, and
+    is the same in every worker running the same code.
+    """
+    h = hashlib.sha1()
+    for root, dirs, files in os.walk(template_dir):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            h.update(os.path.relpath(path, template_dir).encode('utf-8'))
+            with open(path, 'rb') as f:
+                h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+def page_etag(*parts):
+    """
+    Strong ETag for a rendered page from the version stamps it was built
+    from. Callers pass everything the HTML depends on, cheap values only.
+    """
+    raw = '\x1f'.join(str(p) for p in parts)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:32]
+
+
+def not_modified(etag):
+    response = Response(status=304)
+    set_page_etag(response, etag)
+    return response
+
+
+def set_page_etag(response, etag):
+    # Always revalidate, the page changes whenever its versions do
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,150 @@
+import logging
+import re
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+
+logger = logging.getLogger(__name__)
+
+MODES = ('off', 'warn', 'raise')
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PARAM_LIST_RE = re.compile(r'\(\s*(?:\?|%s|:\w+)(?:\s*,\s*(?:\?|%s|:\w+))*\s*\)')
+
+_current_tracker = ContextVar('bustracker_query_tracker', default=None)
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+def query_budget(max_statements):
+    """
+    Declare the most SQL statements a view may run per request, checked when
+    QUERY_GUARD_MODE is warn or raise. Put it closest to the function, under
+    @app.get() and @login_required.
+    """
+    def decorator(fn):
+        fn.query_budget = int(max_statements)
+        return fn
+
+    return decorator
+
+
+def fingerprint_statement(statement):
+    """
+    Normalize SQL so the same statement with different values (or a different
+    number of IN-list params) maps to one fingerprint.
+    """
+    s = _WHITESPACE_RE.sub(' ', statement).strip()
+    s = _STRING_RE.sub('?', s)
+    s = _NUMBER_RE.sub('?', s)
+    s = _PARAM_LIST_RE.sub('(...)', s)
+    return s
+
+
+class QueryTracker:
+    """
+    Statements seen while handling one request.
+    """
+
+    def __init__(self, mode, repeat_limit, budget=None):
+        self.mode = mode
+        self.repeat_limit = int(repeat_limit)
+        self.budget = budget
+        self.statements = 0
+        self.counts = {}
+        self._warned = set()
+
+    def record(self, statement):
+        self.statements += 1
+
+        fp = fingerprint_statement(statement)
+        count = self.counts.get(fp, 0) + 1
+        self.counts[fp] = count
+
+        if count <= self.repeat_limit:
+            return
+
+        msg = 'statement repeated %s times in one request (limit %s): %s' % (
+            count,
+            self.repeat_limit,
+            fp,
+        )
+
+        # Raise at the offending call so the traceback points at the loop
+        if self.mode == 'raise':
+            raise QueryBudgetExceeded(msg)
+
+        if fp not in self._warned:
+            self._warned.add(fp)
+            logger.warning('possible N+1 query: %s', msg)
+
+
+def install_query_guard(engine):
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before_cursor_execute(conn, cursor, statement, params, context, many):
+        tracker = _current_tracker.get()
+        if tracker is not None:
+            tracker.record(statement)
+
+
+def start_tracking(mode, repeat_limit, budget=None):
+    """
+    Returns a token for finish_tracking(), or None when mode is off.
+    """
+    if mode == 'off':
+        return None
+    return _current_tracker.set(QueryTracker(mode, repeat_limit, budget))
+
+
+def get_tracker():
+    return _current_tracker.get()
+
+
+@contextmanager
+def untracked():
+    """
+    Don't count statements run inside the block against the current request,
+    for worker-level work (e.g. refilling a shared cache) that a request only
+    happens to trigger.
+    """
+    token = _current_tracker.set(None)
+    try:
+        yield
+    finally:
+        _current_tracker.reset(token)
+
+
+def check_budget(tracker, endpoint):
+    """
+    Warn or raise when the request ran more statements than its view's budget.
+    """
+    if tracker is None or tracker.budget is None:
+        return
+    if tracker.statements <= tracker.budget:
+        return
+
+    msg = '%s ran %s SQL statements, budget is %s' % (
+        endpoint,
+        tracker.statements,
+        tracker.budget,
+    )
+
+    if tracker.mode == 'raise':
+        raise QueryBudgetExceeded(msg)
+
+    logger.warning('query budget exceeded: %s', msg)
+
+
+def finish_tracking(token):
+    if token is None:
+        return None
+    tracker = _current_tracker.get()
+    _current_tracker.reset(token)
+    return tracker
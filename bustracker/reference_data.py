@@ -0,0 +1,293 @@
+import threading
+
+from bisect import bisect_right
+from collections import namedtuple
+from types import MappingProxyType
+
+from sqlalchemy import select
+
+from bustracker.cache import REFERENCE_DATA_VERSION, get_cache_version
+from bustracker.models.run_type import RunType
+from bustracker.models.school_bus import SchoolBus
+from bustracker.models.school_bus_run_type import SchoolBusRunType
+from bustracker.models.status_type import StatusType
+from bustracker.query_guard import untracked
+from bustracker.timezones import local_now
+
+
+RunTypeRef = namedtuple('RunTypeRef', [
+    'id',
+    'code',
+    'label',
+    'is_departure',
+    'default_after_local_time',
+])
+
+StatusTypeRef = namedtuple('StatusTypeRef', [
+    'id',
+    'code',
+    'label',
+    'hex_color',
+])
+
+SchoolBusRef = namedtuple('SchoolBusRef', [
+    'id',
+    'public_id',
+    'school_id',
+    'label',
+    'color_name',
+    'hex_color',
+    'sort_order',
+])
+
+
+class ReferenceData:
+    """
+    Immutable snapshot of run_types, status_types and the active school bus
+    rosters, indexed for the lookups requests need. Built once per version and
+    shared read-only by every thread in the worker.
+
+      run_types                 active run types, in default_after_local_time order
+      run_type_by_code          code -> RunTypeRef (active only)
+      status_type_by_code       code -> StatusTypeRef (active only)
+      buses_by_school_run_type  (school_id, run_type_id) -> (SchoolBusRef, ...)
+                                in tile order
+      bus_options_by_school     school_id -> run_type_code -> bus picker
+                                options ({'code', 'label'}), in tile order
+    """
+
+    def __init__(self, version, run_types, status_types, buses, links):
+        self.version = version
+
+        self.run_types = tuple(run_types)
+        self.run_type_by_code = MappingProxyType(
+            {rt.code: rt for rt in self.run_types}
+        )
+
+        # default_after_local_time is unique, so these are strictly increasing
+        timed = sorted(
+            (rt for rt in self.run_types
+             if rt.default_after_local_time is not None),
+            key=lambda rt: rt.default_after_local_time,
+        )
+        self._default_boundaries = [rt.default_after_local_time for rt in timed]
+        self._default_run_types = tuple(timed)
+
+        self.status_type_by_code = MappingProxyType(
+            {st.code: st for st in status_types}
+        )
+
+        bus_by_id = {b.id: b for b in buses}
+        grouped = {}
+        for school_bus_id, run_type_id in links:
+            bus = bus_by_id.get(school_bus_id)
+            if bus is None:
+                continue
+            grouped.setdefault((bus.school_id, run_type_id), []).append(bus)
+
+        self.buses_by_school_run_type = MappingProxyType({
+            key: tuple(sorted(group, key=_bus_sort_key))
+            for key, group in grouped.items()
+        })
+
+        # The bus picker's answers, built once here so /bus-options.json is a
+        # dict lookup. Treat the option dicts as read-only.
+        code_by_run_type_id = {rt.id: rt.code for rt in self.run_types}
+        options = {}
+        for (school_id, run_type_id), group in (
+            self.buses_by_school_run_type.items()
+        ):
+            code = code_by_run_type_id.get(run_type_id)
+            if code is None:
+                continue
+            options.setdefault(school_id, {})[code] = tuple(
+                {'code': b.public_id, 'label': b.label} for b in group
+            )
+
+        self.bus_options_by_school = MappingProxyType({
+            school_id: MappingProxyType(by_code)
+            for school_id, by_code in options.items()
+        })
+
+    def default_run_type_at(self, local_time):
+        """
+        The run type whose default_after_local_time most recently passed at
+        local_time. Before the earliest boundary it is the earliest one, the
+        first run of the school's local day. Falls back to the first active
+        run type when none have a boundary.
+        """
+        if not self._default_run_types:
+            return self.run_types[0] if self.run_types else None
+
+        i = bisect_right(self._default_boundaries, local_time) - 1
+        return self._default_run_types[max(i, 0)]
+
+    def get_bus_options(self, school_id, run_type_code):
+        """
+        Picker options for one school and run type, None if the run type
+        isn't active. A run type with no linked buses gives ().
+        """
+        if run_type_code not in self.run_type_by_code:
+            return None
+        by_code = self.bus_options_by_school.get(int(school_id), {})
+        return by_code.get(run_type_code, ())
+
+
+def _bus_sort_key(bus):
+    # Same order as the tile grid: sort_order (NULLs last), then name
+    return (bus.sort_order is None, bus.sort_order or 0, bus.label)
+
+
+def _load_reference_data(db, version):
+    run_types = [
+        RunTypeRef(
+            id=int(r.id),
+            code=str(r.run_type_code),
+            label=str(r.display_name),
+            is_departure=bool(r.is_departure),
+            default_after_local_time=r.default_after_local_time,
+        )
+        for r in db.execute(
+            select(
+                RunType.id,
+                RunType.run_type_code,
+                RunType.display_name,
+                RunType.is_departure,
+                RunType.default_after_local_time,
+            )
+            .where(RunType.is_active == True)
+            .order_by(
+                RunType.default_after_local_time.is_(None),
+                RunType.default_after_local_time,
+                RunType.display_name,
+            )
+        ).all()
+    ]
+
+    status_types = [
+        StatusTypeRef(
+            id=int(r.id),
+            code=str(r.status_type_code),
+            label=str(r.display_name),
+            hex_color=r.hex_color,
+        )
+        for r in db.execute(
+            select(
+                StatusType.id,
+                StatusType.status_type_code,
+                StatusType.display_name,
+                StatusType.hex_color,
+            )
+            .where(StatusType.is_active == True)
+        ).all()
+    ]
+
+    buses = [
+        SchoolBusRef(
+            id=int(r.id),
+            public_id=str(r.public_id),
+            school_id=int(r.school_id),
+            label=str(r.display_name),
+            color_name=r.color_name,
+            hex_color=r.hex_color,
+            sort_order=r.sort_order,
+        )
+        for r in db.execute(
+            select(
+                SchoolBus.id,
+                SchoolBus.public_id,
+                SchoolBus.school_id,
+                SchoolBus.display_name,
+                SchoolBus.color_name,
+                SchoolBus.hex_color,
+                SchoolBus.sort_order,
+            )
+            .where(SchoolBus.is_active == True)
+        ).all()
+    ]
+
+    links = [
+        (int(r.school_bus_id), int(r.run_type_id))
+        for r in db.execute(
+            select(
+                SchoolBusRunType.school_bus_id,
+                SchoolBusRunType.run_type_id,
+            )
+        ).all()
+    ]
+
+    return ReferenceData(version, run_types, status_types, buses, links)
+
+
+_current = None
+_load_lock = threading.Lock()
+
+
+def get_reference_data(db):
+    """
+    This worker's ReferenceData, reloaded only when the 'reference_data'
+    cache_versions counter has moved. The version itself is re-read at most
+    every VERSION_CHECK_SECONDS, so most requests cost no queries at all.
+    """
+    global _current
+
+    version = get_cache_version(db, REFERENCE_DATA_VERSION)
+
+    current = _current
+    if current is not None and current.version == version:
+        return current
+
+    with _load_lock:
+        # Another thread may have loaded it while we waited
+        if _current is not None and _current.version == version:
+            return _current
+
+        # One worker-wide reload, not part of the request that happened to
+        # trigger it
+        with untracked():
+            _current = _load_reference_data(db, version)
+        return _current
+
+
+def get_home_options(db, schools):
+    """
+    Form data for /home. schools are dicts with 'id' and 'timezone'; each
+    gets its own default run type and date from the clock in its timezone.
+    Bus options are for the first school's default run type.
+    """
+    ref = get_reference_data(db)
+
+    school_defaults = {}
+    for school in schools:
+        now = local_now(school['timezone'])
+        run_type = ref.default_run_type_at(now.time().replace(tzinfo=None))
+        school_defaults[school['id']] = {
+            'run_type_code': run_type.code if run_type is not None else None,
+            'date_iso': now.date().isoformat(),
+        }
+
+    bus_options = ()
+    first = school_defaults.get(schools[0]['id']) if schools else None
+    if first is not None and first['run_type_code'] is not None:
+        bus_options = ref.get_bus_options(
+            schools[0]['id'],
+            first['run_type_code'],
+        )
+
+    return {
+        'run_type_options': [
+            {'code': rt.code, 'label': rt.label} for rt in ref.run_types
+        ],
+        'bus_options': bus_options,
+        'school_defaults': school_defaults,
+        'reference_version': ref.version,
+    }
+
+
+def get_bus_options(db, school_id, run_type_code):
+    """
+    Returns (options, reference_version), options None for an unknown run
+    type. The version doubles as the response's ETag.
+    """
+    ref = get_reference_data(db)
+    return ref.get_bus_options(school_id, run_type_code), ref.version
@@ -0,0 +1,102 @@
+from sqlalchemy import update
+
+from bustracker.db import dialect_insert, on_conflict_update
+from bustracker.models.bus_run_rollup import BusRunRollup
+
+
+CATEGORY_WAITING = 'waiting'
+CATEGORY_CHECKED_IN = 'checked_in'
+CATEGORY_DEPARTED = 'departed'
+
+# Tile category -> bus_run_rollups counter
+COUNT_COLUMNS = {
+    CATEGORY_WAITING: 'waiting_count',
+    CATEGORY_CHECKED_IN: 'checked_in_count',
+    CATEGORY_DEPARTED: 'departed_count',
+}
+
+# bus_run_rollups.last_event_type for the run-wide departure
+LAST_EVENT_BUSES_ROLLING = 'buses_rolling'
+
+
+def tile_category(check_in_at_utc, departure_at_utc):
+    if departure_at_utc is not None:
+        return CATEGORY_DEPARTED
+    if check_in_at_utc is not None:
+        return CATEGORY_CHECKED_IN
+    return CATEGORY_WAITING
+
+
+def add_waiting_tiles(db, bus_run_id, school_id, run_date, count):
+    """
+    Count tiles just added to a run (they start out waiting), creating the
+    run's rollup row the first time.
+    """
+    table = BusRunRollup.__table__
+
+    stmt = dialect_insert(table).values(
+        bus_run_id=bus_run_id,
+        school_id=school_id,
+        run_date=run_date,
+        waiting_count=count,
+    )
+    db.execute(on_conflict_update(
+        stmt,
+        ['bus_run_id'],
+        {'waiting_count': table.c.waiting_count + count},
+    ))
+
+
+def apply_category_changes(db, bus_run_id, moves, last_event):
+    """
+    Adjust a run's counters for tiles that changed category.
+
+    moves is [(before_category, after_category), ...], one per changed tile.
+    last_event is (event_type, school_bus_id, occurred_at_utc).
+    """
+    deltas = dict.fromkeys(COUNT_COLUMNS, 0)
+    for before, after in moves:
+        deltas[before] -= 1
+        deltas[after] += 1
+
+    event_type, school_bus_id, occurred_at_utc = last_event
+    values = {
+        'last_event_type': event_type,
+        'last_event_school_bus_id': school_bus_id,
+        'last_event_at_utc': occurred_at_utc,
+    }
+    for category, delta in deltas.items():
+        if delta != 0:
+            col = getattr(BusRunRollup, COUNT_COLUMNS[category])
+            values[COUNT_COLUMNS[category]] = col + delta
+
+    db.execute(
+        update(BusRunRollup)
+        .where(BusRunRollup.bus_run_id == bus_run_id)
+        .values(**values)
+    )
+
+
+def mark_run_departed(db, bus_run_id, occurred_at_utc):
+    """
+    Buses Rolling: every tile is now departed.
+    """
+    # MySQL applies SET assignments left to right, departed_count has to read
+    # the other counters before they are zeroed
+    db.execute(
+        update(BusRunRollup)
+        .where(BusRunRollup.bus_run_id == bus_run_id)
+        .ordered_values(
+            (
+                BusRunRollup.departed_count,
+                BusRunRollup.departed_count
+                + BusRunRollup.waiting_count
+                + BusRunRollup.checked_in_count,
+            ),
+            (BusRunRollup.waiting_count, 0),
+            (BusRunRollup.checked_in_count, 0),
+            (BusRunRollup.last_event_type, LAST_EVENT_BUSES_ROLLING),
+            (BusRunRollup.last_event_school_bus_id, None),
+            (BusRunRollup.last_event_at_utc, occurred_at_utc),
+        )
+    )
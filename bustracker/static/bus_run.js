@@ -0,0 +1,286 @@
+document.addEventListener('DOMContentLoaded', function () {
+  var grid = document.getElementById('tile_grid');
+
+  if (!grid) {
+    return;
+  }
+
+  // Polling interval when EventSource isn't available
+  var POLL_MS = 5000;
+
+  var cursor = grid.getAttribute('data-cursor');
+  var tilesUrl = grid.getAttribute('data-tiles-url');
+
+  function setField(card, fieldName, value) {
+    var el = card.querySelector('[data-field="' + fieldName + '"]');
+    if (!el) {
+      return;
+    }
+    var text = (value === null || value === undefined || value === '') ? '—' : String(value);
+    el.textContent = text;
+  }
+
+  function patchTile(tile) {
+    var card = grid.querySelector(
+      '[data-school-bus-id="' + tile.school_bus_public_id + '"]'
+    );
+
+    // A bus was added to the run since the page loaded
+    if (!card) {
+      window.location.reload();
+      return;
+    }
+
+    setField(card, 'status_label', tile.status_label);
+    setField(card, 'check_in_time', tile.check_in_time);
+    setField(card, 'student_count', tile.student_count);
+    setField(card, 'departure_time', tile.departure_time);
+
+    if (tile.has_departed) {
+      card.setAttribute('data-departed', '1');
+    } else {
+      card.removeAttribute('data-departed');
+    }
+
+    var status = card.querySelector('[data-field="status_label"]');
+    if (status) {
+      status.style.background = tile.status_hex_color || '';
+      status.style.color = tile.status_hex_color ? '#ffffff' : '';
+    }
+  }
+
+  var rollingButton = document.getElementById('buses_rolling');
+
+  // Nothing left to roll once every tile has departed
+  function updateRollingButton() {
+    if (rollingButton && !grid.querySelector('[data-school-bus-id]:not([data-departed])')) {
+      rollingButton.hidden = true;
+    }
+  }
+
+  function applyChanges(payload) {
+    var hasCursor = payload.cursor !== undefined && payload.cursor !== null;
+
+    // Changes can arrive out of order across the stream and catch-up
+    // fetches, skip anything older than what the tiles already show. A full
+    // snapshot (tiles.json after a restore) replaces everything.
+    if (!payload.full &&
+        (!hasCursor || Number(payload.cursor) <= Number(cursor))) {
+      return;
+    }
+
+    for (var i = 0; i < payload.tiles.length; i++) {
+      patchTile(payload.tiles[i]);
+    }
+    updateRollingButton();
+    if (hasCursor) {
+      cursor = String(payload.cursor);
+    }
+  }
+
+  // Fetch tiles changed since our cursor, the server answers 304 when nothing did
+  function catchUp(done) {
+    var xhr = new XMLHttpRequest();
+    xhr.open('GET', tilesUrl + '?since=' + encodeURIComponent(cursor));
+    xhr.onload = function () {
+      if (xhr.status === 200) {
+        applyChanges(JSON.parse(xhr.responseText));
+      }
+      if (done) {
+        done();
+      }
+    };
+    xhr.onerror = function () {
+      if (done) {
+        done();
+      }
+    };
+    xhr.send();
+  }
+
+  // Tile buttons: clicks are queued and sent together, each with its own key
+  // so a batch resent after a timeout is only applied once
+  var BATCH_DELAY_MS = 250;
+  var RETRY_MS = 3000;
+  var MAX_BATCH = 200;
+
+  var batchUrl = grid.getAttribute('data-batch-url');
+  var maxStudentCount = parseInt(grid.getAttribute('data-max-student-count'), 10);
+  var pendingEvents = [];
+  var inFlight = 0;
+  var flushTimer = null;
+
+  function newEventKey() {
+    if (window.crypto && window.crypto.getRandomValues) {
+      var buf = new Uint32Array(4);
+      window.crypto.getRandomValues(buf);
+      return Array.prototype.map.call(buf, function (n) {
+        return n.toString(16);
+      }).join('-');
+    }
+    return String(Date.now()) + '-' + String(Math.random()).slice(2);
+  }
+
+  function scheduleFlush(delayMs) {
+    if (flushTimer) {
+      return;
+    }
+    flushTimer = window.setTimeout(function () {
+      flushTimer = null;
+      flushEvents();
+    }, delayMs);
+  }
+
+  function flushEvents() {
+    if (inFlight > 0 || pendingEvents.length === 0) {
+      return;
+    }
+
+    inFlight = Math.min(pendingEvents.length, MAX_BATCH);
+    var batch = pendingEvents.slice(0, inFlight);
+
+    var xhr = new XMLHttpRequest();
+    xhr.open('POST', batchUrl);
+    xhr.setRequestHeader('Content-Type', 'application/json');
+
+    xhr.onload = function () {
+      var sent = inFlight;
+      inFlight = 0;
+
+      if (xhr.status >= 500) {
+        scheduleFlush(RETRY_MS);
+        return;
+      }
+
+      // Stored (200) or rejected (4xx): either way don't send these again
+      pendingEvents.splice(0, sent);
+
+      if (xhr.status === 200) {
+        applyChanges(JSON.parse(xhr.responseText));
+      } else if (xhr.status === 403 || xhr.status === 404) {
+        // Lost access or the run is gone, the page shows which
+        window.location.reload();
+        return;
+      } else {
+        var message = 'Some taps could not be saved.';
+        try {
+          message += ' ' + JSON.parse(xhr.responseText).error;
+        } catch (err) {
+          // Not a JSON error body, keep the generic message
+        }
+        window.alert(message);
+        // Show what the server actually has for the tiles
+        catchUp();
+      }
+
+      if (pendingEvents.length > 0) {
+        scheduleFlush(0);
+      }
+    };
+
+    // Network error: resend the same events (same keys) later
+    xhr.onerror = function () {
+      inFlight = 0;
+      scheduleFlush(RETRY_MS);
+    };
+
+    xhr.send(JSON.stringify({ events: batch }));
+  }
+
+  if (rollingButton) {
+    rollingButton.addEventListener('click', function () {
+      if (!window.confirm('Mark every remaining bus as departed?')) {
+        return;
+      }
+
+      rollingButton.disabled = true;
+
+      var xhr = new XMLHttpRequest();
+      xhr.open('POST', rollingButton.getAttribute('data-url'));
+      xhr.setRequestHeader('Content-Type', 'application/json');
+      xhr.onload = function () {
+        rollingButton.disabled = false;
+        if (xhr.status === 200) {
+          applyChanges(JSON.parse(xhr.responseText));
+        }
+      };
+      xhr.onerror = function () {
+        rollingButton.disabled = false;
+      };
+      xhr.send('{}');
+    });
+  }
+
+  grid.addEventListener('click', function (e) {
+    var button = e.target.closest('[data-event-type]');
+    if (!button) {
+      return;
+    }
+
+    var card = button.closest('[data-school-bus-id]');
+    var evt = {
+      key: newEventKey(),
+      school_bus_id: card.getAttribute('data-school-bus-id'),
+      type: button.getAttribute('data-event-type')
+    };
+
+    if (evt.type === 'record_count') {
+      var raw = window.prompt('Student count');
+      if (raw === null) {
+        return;
+      }
+      var count = parseInt(raw, 10);
+      // The server rejects the whole batch over an out-of-range count, which
+      // would drop every other tap queued with it
+      if (isNaN(count) || count < 0 || count > maxStudentCount) {
+        window.alert('Enter a student count from 0 to ' + maxStudentCount + '.');
+        return;
+      }
+      evt.student_count = count;
+    }
+
+    pendingEvents.push(evt);
+    scheduleFlush(BATCH_DELAY_MS);
+  });
+
+  function startPolling() {
+    var poll = function () {
+      catchUp(function () {
+        window.setTimeout(poll, POLL_MS);
+      });
+    };
+    window.setTimeout(poll, POLL_MS);
+  }
+
+  if (!window.EventSource) {
+    startPolling();
+    return;
+  }
+
+  var source = new EventSource(grid.getAttribute('data-events-url'));
+
+  // A refused stream (e.g. 503 when the server is at its stream limit) isn't
+  // retried by EventSource, poll instead. Dropped connections reconnect on
+  // their own and stay in CONNECTING.
+  source.addEventListener('error', function () {
+    if (source.readyState === EventSource.CLOSED) {
+      startPolling();
+    }
+  });
+
+  // Pick up whatever changed between rendering the page (or a dropped
+  // connection) and the stream opening
+  source.addEventListener('open', function () {
+    catchUp();
+  });
+
+  source.addEventListener('tiles', function (e) {
+    applyChanges(JSON.parse(e.data));
+  });
+
+  // Server dropped events for this page, start over from fresh HTML
+  source.addEventListener('resync', function () {
+    source.close();
+    window.location.reload();
+  });
+});
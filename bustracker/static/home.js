@@ -7,6 +7,15 @@ document.addEventListener('DOMContentLoaded', function () {
     return;
   }
 
+  var schoolSelect = document.getElementById('school_id');
+  var runTypeSelect = document.getElementById('run_type_code');
+  var optionsUrl = grid.getAttribute('data-options-url');
+
+  // Answers already fetched on this page, keyed by school and run type
+  var optionsCache = {};
+  // Only the latest selection gets rendered
+  var pendingKey = null;
+
   function setAll(isChecked) {
     var boxes = grid.querySelectorAll('input[type="checkbox"][name="bus_codes"]');
     for (var i = 0; i < boxes.length; i++) {
@@ -14,6 +23,71 @@ document.addEventListener('DOMContentLoaded', function () {
     }
   }
 
+  function renderBuses(buses) {
+    while (grid.firstChild) {
+      grid.removeChild(grid.firstChild);
+    }
+
+    if (!buses.length) {
+      var empty = document.createElement('p');
+      empty.className = 'muted';
+      empty.textContent = 'No buses for this school and run type.';
+      grid.appendChild(empty);
+      return;
+    }
+
+    for (var i = 0; i < buses.length; i++) {
+      var label = document.createElement('label');
+      label.className = 'checkbox-card';
+
+      var box = document.createElement('input');
+      box.type = 'checkbox';
+      box.name = 'bus_codes';
+      box.value = buses[i].code;
+      box.checked = true;
+
+      var text = document.createElement('span');
+      text.textContent = buses[i].label;
+
+      label.appendChild(box);
+      label.appendChild(text);
+      grid.appendChild(label);
+    }
+  }
+
+  function loadBuses() {
+    if (!schoolSelect || !runTypeSelect || !optionsUrl) {
+      return;
+    }
+
+    var key = schoolSelect.value + '|' + runTypeSelect.value;
+    pendingKey = key;
+
+    if (optionsCache.hasOwnProperty(key)) {
+      renderBuses(optionsCache[key]);
+      return;
+    }
+
+    var xhr = new XMLHttpRequest();
+    xhr.open(
+      'GET',
+      optionsUrl +
+        '?school_id=' + encodeURIComponent(schoolSelect.value) +
+        '&run_type_code=' + encodeURIComponent(runTypeSelect.value)
+    );
+    xhr.onload = function () {
+      if (xhr.status !== 200) {
+        return;
+      }
+      var buses = JSON.parse(xhr.responseText).buses;
+      optionsCache[key] = buses;
+      if (pendingKey === key) {
+        renderBuses(buses);
+      }
+    };
+    xhr.send();
+  }
+
   btnAll.addEventListener('click', function () {
     setAll(true);
   });
@@ -21,4 +95,32 @@ document.addEventListener('DOMContentLoaded', function () {
   btnClear.addEventListener('click', function () {
     setAll(false);
   });
+
+  var dateInput = document.getElementById('run_date');
+
+  // Each school's defaults come from its own timezone
+  function applySchoolDefaults() {
+    var option = schoolSelect.options[schoolSelect.selectedIndex];
+    if (!option) {
+      return;
+    }
+    var runType = option.getAttribute('data-default-run-type');
+    var runDate = option.getAttribute('data-default-date');
+    if (runTypeSelect && runType) {
+      runTypeSelect.value = runType;
+    }
+    if (dateInput && runDate) {
+      dateInput.value = runDate;
+    }
+  }
+
+  if (schoolSelect) {
+    schoolSelect.addEventListener('change', function () {
+      applySchoolDefaults();
+      loadBuses();
+    });
+  }
+  if (runTypeSelect) {
+    runTypeSelect.addEventListener('change', loadBuses);
+  }
 });
@@ -0,0 +1,610 @@
+import uuid
+
+from datetime import datetime, timezone
+
+from sqlalchemy import (
+    String,
+    and_,
+    case,
+    cast,
+    insert,
+    literal,
+    select,
+    update,
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+
+from bustracker.bus_run_service import bump_run_version, load_tile_changes
+from bustracker.change_feed import record_tile_changes
+from bustracker.models.bus_run import BusRun
+from bustracker.models.bus_run_status import BusRunStatus
+from bustracker.models.bus_run_status_event import BusRunStatusEvent
+from bustracker.models.school_bus import SchoolBus
+from bustracker.models.status_type import StatusType
+from bustracker.reference_data import get_reference_data
+from bustracker.rollup_service import (
+    apply_category_changes,
+    mark_run_departed,
+    tile_category,
+)
+
+
+EVENT_CHECK_IN = 'check_in'
+EVENT_RECORD_COUNT = 'record_count'
+EVENT_DEPART = 'depart'
+# Voids an earlier event of the same tile (corrects_key), the tile is then
+# rebuilt from the rest of its log
+EVENT_CORRECTION = 'correction'
+
+EVENT_TYPES = (
+    EVENT_CHECK_IN,
+    EVENT_RECORD_COUNT,
+    EVENT_DEPART,
+    EVENT_CORRECTION,
+)
+
+# status_types.status_type_code a tile moves to for each event
+STATUS_CODE_BY_EVENT = {
+    EVENT_CHECK_IN: 'checked_in',
+    EVENT_DEPART: 'departed',
+}
+
+MAX_BATCH_EVENTS = 200
+MAX_EVENT_KEY_LENGTH = 64
+MAX_STUDENT_COUNT = 999
+
+# bus_run_statuses columns an event can change
+TILE_STATE_COLUMNS = (
+    'status_type_id',
+    'check_in_at_utc',
+    'student_count',
+    'departure_at_utc',
+)
+
+
+class InvalidStatusEvents(ValueError):
+    pass
+
+
+class StatusTypesNotConfigured(RuntimeError):
+    pass
+
+
+def _utc_now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _parse_student_count(raw):
+    # bool is an int subclass, don't accept true/false as 1/0
+    if isinstance(raw, bool):
+        raise InvalidStatusEvents('student_count must be a number')
+    try:
+        count = int(raw)
+    except (TypeError, ValueError):
+        raise InvalidStatusEvents('student_count must be a number')
+
+    if count < 0 or count > MAX_STUDENT_COUNT:
+        raise InvalidStatusEvents(
+            'student_count must be between 0 and %s' % MAX_STUDENT_COUNT
+        )
+    return count
+
+
+def parse_status_events(payload):
+    """
+    Validate a batch request body:
+      {"events": [{"key": ..., "school_bus_id": ..., "type": ...,
+                   "student_count": ..., "corrects_key": ...}, ...]}
+
+    school_bus_id is the tile's SchoolBus public_id, corrects_key (corrections
+    only) is the key of the event being voided. Returns a list of
+    normalized event dicts, a key repeated within the batch is kept once.
+    Raises InvalidStatusEvents.
+    """
+    if not isinstance(payload, dict) or not isinstance(payload.get('events'), list):
+        raise InvalidStatusEvents('expected {"events": [...]}')
+
+    raw_events = payload['events']
+    if len(raw_events) == 0:
+        raise InvalidStatusEvents('no events')
+    if len(raw_events) > MAX_BATCH_EVENTS:
+        raise InvalidStatusEvents('at most %s events per batch' % MAX_BATCH_EVENTS)
+
+    events = []
+    seen_keys = set()
+
+    for raw in raw_events:
+        if not isinstance(raw, dict):
+            raise InvalidStatusEvents('each event must be an object')
+
+        key = str(raw.get('key') or '').strip()
+        if key == '' or len(key) > MAX_EVENT_KEY_LENGTH:
+            raise InvalidStatusEvents(
+                'event key must be 1-%s characters' % MAX_EVENT_KEY_LENGTH
+            )
+
+        event_type = raw.get('type')
+        if event_type not in EVENT_TYPES:
+            raise InvalidStatusEvents('unknown event type: %s' % event_type)
+
+        school_bus_id = str(raw.get('school_bus_id') or '').strip()
+        if school_bus_id == '':
+            raise InvalidStatusEvents('missing school_bus_id')
+
+        student_count = None
+        if event_type == EVENT_RECORD_COUNT:
+            student_count = _parse_student_count(raw.get('student_count'))
+
+        corrects_key = None
+        if event_type == EVENT_CORRECTION:
+            corrects_key = str(raw.get('corrects_key') or '').strip()
+            if corrects_key == '':
+                raise InvalidStatusEvents('correction is missing corrects_key')
+
+        if key in seen_keys:
+            continue
+        seen_keys.add(key)
+
+        events.append({
+            'key': key,
+            'type': event_type,
+            'school_bus_id': school_bus_id,
+            'student_count': student_count,
+            'corrects_key': corrects_key,
+        })
+
+    return events
+
+
+def _required_status_types(db):
+    """
+    status_types by code, checked up front so a missing row fails the
+    request before anything is written.
+    """
+    status_types = get_reference_data(db).status_type_by_code
+    missing = sorted(
+        code for code in STATUS_CODE_BY_EVENT.values()
+        if code not in status_types
+    )
+    if missing:
+        raise StatusTypesNotConfigured(
+            'status types not configured: %s' % ', '.join(missing)
+        )
+    return status_types
+
+
+def _status_type_id_for(event_type, status_types):
+    return status_types[STATUS_CODE_BY_EVENT[event_type]].id
+
+
+def _apply_event(state, event, at, status_types):
+    """
+    Apply one check_in/record_count/depart event to a tile's state dict.
+    Returns True if the tile changed. Check-in and departure keep their first
+    timestamp, so a late duplicate click never moves them.
+    """
+    event_type = event['type']
+
+    if event_type == EVENT_CHECK_IN:
+        if state['check_in_at_utc'] is not None:
+            return False
+        state['check_in_at_utc'] = at
+        if state['departure_at_utc'] is None:
+            state['status_type_id'] = _status_type_id_for(
+                event_type,
+                status_types,
+            )
+        return True
+
+    if event_type == EVENT_RECORD_COUNT:
+        if state['student_count'] == event['student_count']:
+            return False
+        state['student_count'] = event['student_count']
+        return True
+
+    if state['departure_at_utc'] is not None:
+        return False
+    state['departure_at_utc'] = at
+    state['status_type_id'] = _status_type_id_for(event_type, status_types)
+    return True
+
+
+def _replay_tile_state(state, log_rows, status_types):
+    """
+    Rebuild a tile's state from its log (rows ordered by id), skipping
+    corrections and the events they void. Only used after a correction, the
+    normal path updates the state row incrementally.
+    """
+    voided_ids = {
+        r.corrects_event_id for r in log_rows if r.corrects_event_id is not None
+    }
+
+    for col_name in TILE_STATE_COLUMNS:
+        state[col_name] = None
+
+    for r in log_rows:
+        if r.event_type == EVENT_CORRECTION or r.id in voided_ids:
+            continue
+        event = {'type': r.event_type, 'student_count': r.student_count}
+        _apply_event(state, event, r.occurred_at_utc, status_types)
+
+
+def _tile_update_stmt(states, version):
+    """
+    One UPDATE for every changed tile: each column is a CASE on the row id.
+    """
+    ids = [st['id'] for st in states]
+    values = {'change_version': version}
+
+    for col_name in TILE_STATE_COLUMNS:
+        col = getattr(BusRunStatus, col_name)
+        values[col_name] = case(
+            {st['id']: st[col_name] for st in states},
+            value=BusRunStatus.id,
+            else_=col,
+        )
+
+    return (
+        update(BusRunStatus)
+        .where(BusRunStatus.id.in_(ids))
+        .values(**values)
+    )
+
+
+def _load_correction_targets(db, run_id, events, states):
+    """
+    Returns {corrects_key: event id} for the corrections in the batch,
+    checking each target exists on the same tile and isn't itself a
+    correction.
+    """
+    target_keys = {e['corrects_key'] for e in events if e['corrects_key']}
+    if not target_keys:
+        return {}
+
+    rows = db.execute(
+        select(
+            BusRunStatusEvent.id,
+            BusRunStatusEvent.client_event_key,
+            BusRunStatusEvent.school_bus_id,
+            BusRunStatusEvent.event_type,
+        )
+        .where(BusRunStatusEvent.bus_run_id == run_id)
+        .where(BusRunStatusEvent.client_event_key.in_(target_keys))
+    ).all()
+    targets = {str(r.client_event_key): r for r in rows}
+
+    for e in events:
+        if not e['corrects_key']:
+            continue
+
+        target = targets.get(e['corrects_key'])
+        school_bus_id = states[e['school_bus_id']]['school_bus_id']
+        if target is None or target.school_bus_id != school_bus_id:
+            raise InvalidStatusEvents(
+                'no event %s for this bus' % e['corrects_key']
+            )
+        if target.event_type == EVENT_CORRECTION:
+            raise InvalidStatusEvents('a correction cannot be corrected')
+
+    return {key: int(r.id) for key, r in targets.items()}
+
+
+def apply_status_events(db, run_ref, user_id, events):
+    """
+    Append a batch of parsed events to the run's log and update the matching
+    current-state rows (bus_run_statuses), all in the caller's transaction
+    (commit it before answering).
+
+    run_ref must come from get_bus_run_ref(..., for_update=True): the row lock
+    serializes batches for one run, so the duplicate check below can't race.
+    Events whose key was already stored for this run are skipped, so a client
+    can resend a whole batch after a timeout.
+
+    Round-trips don't grow with the batch size: tile and stored key read,
+    multi-row insert, version bump, one tile UPDATE, the rollup UPDATE,
+    changed tile read and the change feed insert. Corrections add a target
+    lookup and a read of the corrected tiles' log.
+
+    Returns:
+      {'applied': [key, ...], 'duplicates': [key, ...],
+       'cursor': new change_version or None, 'tiles': [changed tile, ...]}
+    """
+    keys = [e['key'] for e in events]
+    bus_public_ids = {e['school_bus_id'] for e in events}
+
+    # One read for the tiles and for any of these keys already stored against
+    # them (a batch resent after a timeout). Extra rows appear only for those
+    # duplicates.
+    rows = db.execute(
+        select(
+            BusRunStatus.id,
+            BusRunStatus.school_bus_id,
+            *[getattr(BusRunStatus, c) for c in TILE_STATE_COLUMNS],
+            SchoolBus.public_id.label('school_bus_public_id'),
+            BusRunStatusEvent.client_event_key.label('stored_key'),
+        )
+        .join(SchoolBus, SchoolBus.id == BusRunStatus.school_bus_id)
+        .outerjoin(
+            BusRunStatusEvent,
+            and_(
+                BusRunStatusEvent.bus_run_id == BusRunStatus.bus_run_id,
+                BusRunStatusEvent.school_bus_id == BusRunStatus.school_bus_id,
+                BusRunStatusEvent.client_event_key.in_(keys),
+            ),
+        )
+        .where(BusRunStatus.bus_run_id == run_ref.id)
+        .where(SchoolBus.public_id.in_(bus_public_ids))
+    ).all()
+
+    states = {}
+    stored_keys = set()
+    for r in rows:
+        if r.stored_key is not None:
+            stored_keys.add(r.stored_key)
+        public_id = str(r.school_bus_public_id)
+        if public_id not in states:
+            state = dict(r._mapping)
+            del state['stored_key']
+            states[public_id] = state
+
+    unknown = bus_public_ids - set(states)
+    if unknown:
+        raise InvalidStatusEvents(
+            'bus not in this run: %s' % ', '.join(sorted(unknown))
+        )
+
+    new_events = [e for e in events if e['key'] not in stored_keys]
+    result = {
+        'applied': [e['key'] for e in new_events],
+        'duplicates': [k for k in keys if k in stored_keys],
+        'cursor': None,
+        'tiles': [],
+    }
+    if not new_events:
+        return result
+
+    target_ids = _load_correction_targets(db, run_ref.id, new_events, states)
+
+    categories_before = {
+        st['id']: tile_category(st['check_in_at_utc'], st['departure_at_utc'])
+        for st in states.values()
+    }
+
+    now = _utc_now()
+    status_types = _required_status_types(db)
+
+    # Apply in order, recording the status each event left its tile in.
+    # Corrected tiles are rebuilt from the log once the batch is stored.
+    changed = {}
+    replay = {}
+    log_values = []
+
+    for e in new_events:
+        state = states[e['school_bus_id']]
+
+        if e['type'] == EVENT_CORRECTION:
+            replay[state['school_bus_id']] = state
+        elif _apply_event(state, e, now, status_types):
+            changed[state['id']] = state
+
+        log_values.append({
+            'bus_run_id': run_ref.id,
+            'school_bus_id': state['school_bus_id'],
+            'event_type': e['type'],
+            'status_type_id': (
+                None if e['type'] == EVENT_CORRECTION
+                else state['status_type_id']
+            ),
+            'student_count': e['student_count'],
+            'client_event_key': e['key'],
+            'corrects_event_id': target_ids.get(e['corrects_key']),
+            'created_by_user_id': user_id,
+            'occurred_at_utc': now,
+        })
+
+    try:
+        db.execute(insert(BusRunStatusEvent.__table__), log_values)
+    except IntegrityError:
+        # Only a key already stored against a different bus gets here
+        raise InvalidStatusEvents('event key already used in this run')
+
+    if replay:
+        log_rows = db.execute(
+            select(
+                BusRunStatusEvent.id,
+                BusRunStatusEvent.school_bus_id,
+                BusRunStatusEvent.event_type,
+                BusRunStatusEvent.student_count,
+                BusRunStatusEvent.corrects_event_id,
+                BusRunStatusEvent.occurred_at_utc,
+            )
+            .where(BusRunStatusEvent.bus_run_id == run_ref.id)
+            .where(BusRunStatusEvent.school_bus_id.in_(list(replay)))
+            .order_by(BusRunStatusEvent.id)
+        ).all()
+
+        for school_bus_id, state in replay.items():
+            _replay_tile_state(
+                state,
+                [r for r in log_rows if r.school_bus_id == school_bus_id],
+                status_types,
+            )
+            changed[state['id']] = state
+
+    if not changed:
+        return result
+
+    # Tiles are stamped by the UPDATE below, not by bump_run_version
+    version = bump_run_version(db, run_ref, ())
+    db.execute(_tile_update_stmt(list(changed.values()), version))
+
+    last = log_values[-1]
+    apply_category_changes(
+        db,
+        run_ref.id,
+        [
+            (
+                categories_before[st['id']],
+                tile_category(st['check_in_at_utc'], st['departure_at_utc']),
+            )
+            for st in changed.values()
+        ],
+        (last['event_type'], last['school_bus_id'], now),
+    )
+
+    changes = load_tile_changes(db, run_ref.public_id, version - 1)
+
+    record_tile_changes(
+        db,
+        run_ref.id,
+        run_ref.public_id,
+        version,
+        changes['tiles'],
+    )
+
+    result['cursor'] = version
+    result['tiles'] = changes['tiles']
+    return result
+
+
+def get_bus_run_history(db, bus_run_id):
+    """
+    The run's full event log, oldest first, for history and reporting.
+    Tile pages never read this, they only need bus_run_statuses.
+    """
+    target = aliased(BusRunStatusEvent)
+
+    stmt = (
+        select(
+            BusRunStatusEvent.id,
+            BusRunStatusEvent.client_event_key,
+            BusRunStatusEvent.event_type,
+            BusRunStatusEvent.student_count,
+            BusRunStatusEvent.occurred_at_utc,
+            BusRunStatusEvent.corrects_event_id,
+            target.client_event_key.label('corrects_key'),
+            SchoolBus.public_id.label('school_bus_public_id'),
+            SchoolBus.display_name.label('bus_label'),
+            StatusType.status_type_code,
+            StatusType.display_name.label('status_label'),
+        )
+        .join(SchoolBus, SchoolBus.id == BusRunStatusEvent.school_bus_id)
+        .outerjoin(StatusType, StatusType.id == BusRunStatusEvent.status_type_id)
+        .outerjoin(target, target.id == BusRunStatusEvent.corrects_event_id)
+        .where(BusRunStatusEvent.bus_run_id == bus_run_id)
+        .order_by(BusRunStatusEvent.id)
+    )
+    rows = db.execute(stmt).all()
+
+    voided_ids = {
+        r.corrects_event_id for r in rows if r.corrects_event_id is not None
+    }
+
+    return [
+        {
+            'key': str(r.client_event_key),
+            'type': str(r.event_type),
+            'school_bus_public_id': str(r.school_bus_public_id),
+            'bus_label': str(r.bus_label),
+            'status_code': r.status_type_code,
+            'status_label': r.status_label,
+            'student_count': r.student_count,
+            'occurred_at_utc': r.occurred_at_utc.isoformat() + 'Z',
+            'corrects_key': r.corrects_key,
+            'is_voided': r.id in voided_ids,
+        }
+        for r in rows
+    ]
+
+
+def mark_buses_rolling(db, run_ref, user_id):
+    """
+    "Buses Rolling": depart every bus in the run that hasn't departed yet.
+
+    Set-based whatever the number of buses: one INSERT ... SELECT logs a
+    depart event per bus, one UPDATE moves all their tiles (and one the
+    run's rollup), and a single change feed row carries every changed tile
+    to viewers at once.
+
+    run_ref must come from get_bus_run_ref(..., for_update=True). Running it
+    twice is harmless, the second call finds nothing left to depart.
+
+    Returns {'departed': count, 'cursor': version or None, 'tiles': [...]}.
+    """
+    result = {'departed': 0, 'cursor': None, 'tiles': []}
+
+    now = _utc_now()
+    version = run_ref.change_version + 1
+    departed_type_id = _status_type_id_for(
+        EVENT_DEPART,
+        _required_status_types(db),
+    )
+
+    # One event per bus, keyed off a per-call prefix so they can't collide
+    # with browser keys
+    key_prefix = 'rolling-%s-' % uuid.uuid4().hex[:16]
+
+    remaining = (
+        select(
+            literal(run_ref.id),
+            BusRunStatus.school_bus_id,
+            literal(EVENT_DEPART),
+            literal(departed_type_id),
+            literal(key_prefix) + cast(BusRunStatus.school_bus_id, String),
+            literal(user_id),
+            literal(now),
+        )
+        .where(BusRunStatus.bus_run_id == run_ref.id)
+        .where(BusRunStatus.departure_at_utc.is_(None))
+    )
+    db.execute(
+        insert(BusRunStatusEvent.__table__).from_select(
+            [
+                'bus_run_id',
+                'school_bus_id',
+                'event_type',
+                'status_type_id',
+                'client_event_key',
+                'created_by_user_id',
+                'occurred_at_utc',
+            ],
+            remaining,
+        )
+    )
+
+    departed = db.execute(
+        update(BusRunStatus)
+        .where(BusRunStatus.bus_run_id == run_ref.id)
+        .where(BusRunStatus.departure_at_utc.is_(None))
+        .values(
+            departure_at_utc=now,
+            status_type_id=departed_type_id,
+            change_version=version,
+        )
+    ).rowcount
+    if departed == 0:
+        return result
+
+    mark_run_departed(db, run_ref.id, now)
+
+    # Run row is locked, so version is still the next one
+    db.execute(
+        update(BusRun)
+        .where(BusRun.id == run_ref.id)
+        .values(change_version=version)
+    )
+
+    changes = load_tile_changes(db, run_ref.public_id, run_ref.change_version)
+    record_tile_changes(
+        db,
+        run_ref.id,
+        run_ref.public_id,
+        version,
+        changes['tiles'],
+    )
+
+    result['departed'] = departed
+    result['cursor'] = version
+    result['tiles'] = changes['tiles']
+    return result
@@ -0,0 +1,16 @@
+from datetime import datetime, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+
+@lru_cache(maxsize=None)
+def get_zone(tz_name):
+    """
+    ZoneInfo for an IANA name, built once per worker. School timezones are a
+    short fixed list so the cache stays small.
+    """
+    return ZoneInfo(tz_name)
+
+
+def local_now(tz_name):
+    return datetime.now(timezone.utc).astimezone(get_zone(tz_name))
@@ -0,0 +1,24 @@
+# gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Bus run pages hold a Server-Sent Events stream open (up to
+# bustracker.live.MAX_STREAM_SECONDS), and each open stream occupies a worker
+# thread. The default sync worker has a single thread, so a few open pages
+# would block everything else. gthread gives each worker a pool of threads;
+# SSE_MAX_STREAMS_PER_WORKER (below GUNICORN_THREADS) keeps some of them for
+# ordinary requests.
+import os
+
+
+bind = os.getenv('GUNICORN_BIND', '127.0.0.1:8000')
+
+worker_class = 'gthread'
+workers = int(os.getenv('GUNICORN_WORKERS', '2'))
+threads = int(os.getenv('GUNICORN_THREADS', '32'))
+
+# Heartbeat timeout for the worker process, not a per-request limit, so long
+# streams are fine under gthread
+timeout = 30
+graceful_timeout = 30
+
+# Connections idle between requests (e.g. after a page load)
+keepalive = 5
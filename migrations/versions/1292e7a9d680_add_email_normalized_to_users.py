@@ -0,0 +1,81 @@
+"""add email_normalized to users
+
+Revision ID: 1292e7a9d680
+Revises: 9c099332a531
+Create Date: 2026-10-18 09:41:07.228914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1292e7a9d680'
+down_revision: Union[str, Sequence[str], None] = '9c099332a531'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _check_existing_emails():
+    # Fail before changing anything rather than partway through the ALTER
+    conn = op.get_bind()
+
+    padded = conn.execute(
+        sa.text(
+            'SELECT email FROM users '
+            "WHERE email REGEXP '^[[:space:]]|[[:space:]]$' "
+            'ORDER BY email'
+        )
+    ).scalars().all()
+    if padded:
+        raise RuntimeError(
+            'users.email has leading/trailing whitespace, trim these first: '
+            + ', '.join(repr(e) for e in padded)
+        )
+
+    duplicates = conn.execute(
+        sa.text(
+            'SELECT LOWER(email) FROM users '
+            'GROUP BY LOWER(email) '
+            'HAVING COUNT(*) > 1 '
+            'ORDER BY LOWER(email)'
+        )
+    ).scalars().all()
+    if duplicates:
+        raise RuntimeError(
+            'users.email has case-variant duplicates, merge or remove them '
+            'first: ' + ', '.join(duplicates)
+        )
+
+
+def upgrade() -> None:
+    _check_existing_emails()
+
+    # Stored generated column so MySQL keeps it in sync with email (existing
+    # rows are filled in by the ALTER), use raw SQL to specify position.
+    # Emails are trimmed in Python before they are written, see User.
+    op.execute(
+        sa.text(
+            'ALTER TABLE users '
+            'ADD COLUMN email_normalized VARCHAR(320) '
+            'GENERATED ALWAYS AS (LOWER(email)) STORED NOT NULL '
+            'AFTER email'
+        )
+    )
+
+    op.create_unique_constraint(
+        'uq_users_email_normalized',
+        'users',
+        ['email_normalized'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(
+        'uq_users_email_normalized',
+        'users',
+        type_='unique',
+    )
+    op.drop_column('users', 'email_normalized')
@@ -0,0 +1,52 @@
+"""add change_version to bus_runs, bus_run_statuses
+
+Revision ID: 3b8e51d0c7a4
+Revises: 647fdd86b53e
+Create Date: 2026-10-18 13:26:41.508117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b8e51d0c7a4'
+down_revision: Union[str, Sequence[str], None] = '647fdd86b53e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Use raw SQL to specify column position
+    op.execute(
+        sa.text(
+            'ALTER TABLE bus_runs '
+            'ADD COLUMN change_version BIGINT NOT NULL DEFAULT 0 '
+            'AFTER is_active'
+        )
+    )
+    op.execute(
+        sa.text(
+            'ALTER TABLE bus_run_statuses '
+            'ADD COLUMN change_version BIGINT NOT NULL DEFAULT 0 '
+            'AFTER departure_at_utc'
+        )
+    )
+
+    op.create_index(
+        'ix_bus_run_statuses_run_version',
+        'bus_run_statuses',
+        ['bus_run_id', 'change_version'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        'ix_bus_run_statuses_run_version',
+        table_name='bus_run_statuses',
+    )
+    op.drop_column('bus_run_statuses', 'change_version')
+    op.drop_column('bus_runs', 'change_version')
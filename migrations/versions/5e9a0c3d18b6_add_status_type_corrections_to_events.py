@@ -0,0 +1,77 @@
+"""add status_type_id, corrects_event_id to bus_run_status_events
+
+Revision ID: 5e9a0c3d18b6
+Revises: d41f6b27e3c9
+Create Date: 2026-10-18 15:58:30.192774
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e9a0c3d18b6'
+down_revision: Union[str, Sequence[str], None] = 'd41f6b27e3c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Use raw SQL to specify column position
+    op.execute(
+        sa.text(
+            'ALTER TABLE bus_run_status_events '
+            'ADD COLUMN status_type_id BIGINT NULL '
+            'AFTER event_type'
+        )
+    )
+    op.execute(
+        sa.text(
+            'ALTER TABLE bus_run_status_events '
+            'ADD COLUMN corrects_event_id BIGINT NULL '
+            'AFTER client_event_key'
+        )
+    )
+
+    op.create_foreign_key(
+        'fk_bus_run_status_events_status_type_id',
+        'bus_run_status_events',
+        'status_types',
+        ['status_type_id'],
+        ['id'],
+    )
+    op.create_foreign_key(
+        'fk_bus_run_status_events_corrects_event_id',
+        'bus_run_status_events',
+        'bus_run_status_events',
+        ['corrects_event_id'],
+        ['id'],
+    )
+
+    op.create_index(
+        'ix_bus_run_status_events_history',
+        'bus_run_status_events',
+        ['bus_run_id', 'school_bus_id', 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        'ix_bus_run_status_events_history',
+        table_name='bus_run_status_events',
+    )
+    op.drop_constraint(
+        'fk_bus_run_status_events_corrects_event_id',
+        'bus_run_status_events',
+        type_='foreignkey',
+    )
+    op.drop_constraint(
+        'fk_bus_run_status_events_status_type_id',
+        'bus_run_status_events',
+        type_='foreignkey',
+    )
+    op.drop_column('bus_run_status_events', 'corrects_event_id')
+    op.drop_column('bus_run_status_events', 'status_type_id')
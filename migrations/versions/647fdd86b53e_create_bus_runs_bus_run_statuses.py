@@ -0,0 +1,62 @@
+"""create bus_runs, bus_run_statuses
+
+Revision ID: 647fdd86b53e
+Revises: 1292e7a9d680
+Create Date: 2026-10-18 11:02:53.871620
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '647fdd86b53e'
+down_revision: Union[str, Sequence[str], None] = '1292e7a9d680'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('bus_runs',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('public_id', sa.String(length=36), nullable=False),
+    sa.Column('school_id', sa.BigInteger(), nullable=False),
+    sa.Column('run_date', sa.Date(), nullable=False),
+    sa.Column('run_type_id', sa.BigInteger(), nullable=False),
+    sa.Column('created_by_user_id', sa.BigInteger(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), server_default=sa.text('1'), nullable=False),
+    sa.Column('created_at_utc', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    sa.Column('updated_at_utc', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP'), nullable=False),
+    sa.ForeignKeyConstraint(['created_by_user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['run_type_id'], ['run_types.id'], ),
+    sa.ForeignKeyConstraint(['school_id'], ['schools.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('public_id')
+    )
+    op.create_table('bus_run_statuses',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('bus_run_id', sa.BigInteger(), nullable=False),
+    sa.Column('school_bus_id', sa.BigInteger(), nullable=False),
+    sa.Column('status_type_id', sa.BigInteger(), nullable=True),
+    sa.Column('check_in_at_utc', sa.DateTime(), nullable=True),
+    sa.Column('student_count', sa.Integer(), nullable=True),
+    sa.Column('departure_at_utc', sa.DateTime(), nullable=True),
+    sa.Column('created_at_utc', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    sa.Column('updated_at_utc', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP'), nullable=False),
+    sa.ForeignKeyConstraint(['bus_run_id'], ['bus_runs.id'], ),
+    sa.ForeignKeyConstraint(['school_bus_id'], ['school_buses.id'], ),
+    sa.ForeignKeyConstraint(['status_type_id'], ['status_types.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('bus_run_id', 'school_bus_id', name='uq_bus_run_statuses_run_bus')
+    )
+    op.create_index('ix_bus_run_statuses_run_tile', 'bus_run_statuses', ['bus_run_id', 'school_bus_id', 'status_type_id', 'check_in_at_utc', 'student_count', 'departure_at_utc'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_bus_run_statuses_run_tile', table_name='bus_run_statuses')
+    op.drop_table('bus_run_statuses')
+    op.drop_table('bus_runs')
@@ -0,0 +1,36 @@
+"""add unique (school_id, run_date, run_type_id) to bus_runs
+
+Revision ID: 8f1c7a2b94d5
+Revises: 5e9a0c3d18b6
+Create Date: 2026-10-18 16:40:17.604158
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f1c7a2b94d5'
+down_revision: Union[str, Sequence[str], None] = '5e9a0c3d18b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_unique_constraint(
+        'uq_bus_runs_school_date_type',
+        'bus_runs',
+        ['school_id', 'run_date', 'run_type_id'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(
+        'uq_bus_runs_school_date_type',
+        'bus_runs',
+        type_='unique',
+    )
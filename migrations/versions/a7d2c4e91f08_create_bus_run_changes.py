@@ -0,0 +1,39 @@
+"""create bus_run_changes
+
+Revision ID: a7d2c4e91f08
+Revises: 3b8e51d0c7a4
+Create Date: 2026-10-18 14:12:09.331845
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d2c4e91f08'
+down_revision: Union[str, Sequence[str], None] = '3b8e51d0c7a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('bus_run_changes',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('bus_run_id', sa.BigInteger(), nullable=False),
+    sa.Column('bus_run_public_id', sa.String(length=36), nullable=False),
+    sa.Column('change_version', sa.BigInteger(), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('created_at_utc', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    sa.ForeignKeyConstraint(['bus_run_id'], ['bus_runs.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_bus_run_changes_created_at_utc', 'bus_run_changes', ['created_at_utc'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_bus_run_changes_created_at_utc', table_name='bus_run_changes')
+    op.drop_table('bus_run_changes')
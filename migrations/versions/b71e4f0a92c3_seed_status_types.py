@@ -0,0 +1,77 @@
+"""seed status_types
+
+Revision ID: b71e4f0a92c3
+Revises: c2e8d94f6a17
+Create Date: 2026-10-18 19:02:11.415208
+
+"""
+import uuid
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71e4f0a92c3'
+down_revision: Union[str, Sequence[str], None] = 'c2e8d94f6a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Codes the app looks up by name (status_event_service.STATUS_CODE_BY_EVENT),
+# check-ins and departures fail without them
+STATUS_TYPES = (
+    ('checked_in', 'Checked In', 'Green', '#2E7D32'),
+    ('departed', 'Departed', 'Blue', '#1565C0'),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+
+    # Leave rows an environment already created (e.g. from seed CSVs) alone
+    for code, display_name, color_name, hex_color in STATUS_TYPES:
+        conn.execute(
+            sa.text(
+                'INSERT INTO status_types '
+                '(public_id, status_type_code, display_name, color_name, '
+                'hex_color) '
+                'SELECT :public_id, :code, :display_name, :color_name, '
+                ':hex_color '
+                'FROM (SELECT 1) AS one '
+                'WHERE NOT EXISTS '
+                '(SELECT 1 FROM status_types WHERE status_type_code = :code)'
+            ),
+            {
+                'public_id': str(uuid.uuid4()),
+                'code': code,
+                'display_name': display_name,
+                'color_name': color_name,
+                'hex_color': hex_color,
+            },
+        )
+
+    # Running workers reload their reference data
+    conn.execute(
+        sa.text(
+            "UPDATE cache_versions SET version = version + 1 "
+            "WHERE name = 'reference_data'"
+        )
+    )
+    conn.execute(
+        sa.text(
+            "INSERT INTO cache_versions (name, version) "
+            "SELECT 'reference_data', 1 FROM (SELECT 1) AS one "
+            "WHERE NOT EXISTS "
+            "(SELECT 1 FROM cache_versions WHERE name = 'reference_data')"
+        )
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Keep the rows: bus_run_statuses and the event log may point at them
+    pass
@@ -0,0 +1,66 @@
+"""create bus_run_rollups
+
+Revision ID: c2e8d94f6a17
+Revises: 8f1c7a2b94d5
+Create Date: 2026-10-18 17:21:45.880392
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2e8d94f6a17'
+down_revision: Union[str, Sequence[str], None] = '8f1c7a2b94d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('bus_run_rollups',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('bus_run_id', sa.BigInteger(), nullable=False),
+    sa.Column('school_id', sa.BigInteger(), nullable=False),
+    sa.Column('run_date', sa.Date(), nullable=False),
+    sa.Column('waiting_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('checked_in_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('departed_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('last_event_type', sa.String(length=32), nullable=True),
+    sa.Column('last_event_school_bus_id', sa.BigInteger(), nullable=True),
+    sa.Column('last_event_at_utc', sa.DateTime(), nullable=True),
+    sa.Column('created_at_utc', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    sa.Column('updated_at_utc', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP'), nullable=False),
+    sa.ForeignKeyConstraint(['bus_run_id'], ['bus_runs.id'], ),
+    sa.ForeignKeyConstraint(['last_event_school_bus_id'], ['school_buses.id'], ),
+    sa.ForeignKeyConstraint(['school_id'], ['schools.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('bus_run_id')
+    )
+    op.create_index('ix_bus_run_rollups_school_date', 'bus_run_rollups', ['school_id', 'run_date'], unique=False)
+
+    # Backfill existing runs, a one-time scan of bus_run_statuses
+    op.execute(
+        sa.text(
+            'INSERT INTO bus_run_rollups '
+            '(bus_run_id, school_id, run_date, '
+            'waiting_count, checked_in_count, departed_count) '
+            'SELECT r.id, r.school_id, r.run_date, '
+            'COALESCE(SUM(s.id IS NOT NULL '
+            'AND s.check_in_at_utc IS NULL AND s.departure_at_utc IS NULL), 0), '
+            'COALESCE(SUM(s.check_in_at_utc IS NOT NULL '
+            'AND s.departure_at_utc IS NULL), 0), '
+            'COALESCE(SUM(s.departure_at_utc IS NOT NULL), 0) '
+            'FROM bus_runs r '
+            'LEFT JOIN bus_run_statuses s ON s.bus_run_id = r.id '
+            'GROUP BY r.id, r.school_id, r.run_date'
+        )
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_bus_run_rollups_school_date', table_name='bus_run_rollups')
+    op.drop_table('bus_run_rollups')
@@ -0,0 +1,43 @@
+"""create bus_run_status_events
+
+Revision ID: d41f6b27e3c9
+Revises: a7d2c4e91f08
+Create Date: 2026-10-18 15:04:52.716203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41f6b27e3c9'
+down_revision: Union[str, Sequence[str], None] = 'a7d2c4e91f08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('bus_run_status_events',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('bus_run_id', sa.BigInteger(), nullable=False),
+    sa.Column('school_bus_id', sa.BigInteger(), nullable=False),
+    sa.Column('event_type', sa.String(length=32), nullable=False),
+    sa.Column('student_count', sa.Integer(), nullable=True),
+    sa.Column('client_event_key', sa.String(length=64), nullable=False),
+    sa.Column('created_by_user_id', sa.BigInteger(), nullable=True),
+    sa.Column('occurred_at_utc', sa.DateTime(), nullable=False),
+    sa.Column('created_at_utc', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    sa.ForeignKeyConstraint(['bus_run_id'], ['bus_runs.id'], ),
+    sa.ForeignKeyConstraint(['created_by_user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['school_bus_id'], ['school_buses.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('bus_run_id', 'client_event_key', name='uq_bus_run_status_events_run_key')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('bus_run_status_events')
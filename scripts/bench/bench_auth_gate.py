@@ -0,0 +1,172 @@
+# 1) stdlib
+import os
+import statistics
+import sys
+import time
+
+# 2) third-party
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+# 3) app
+import bustracker.models
+from bustracker.auth_service import _lookup_user_for_gate, _norm_email
+from bustracker.config import DevConfig, ProdConfig
+from bustracker.models.school import School
+from bustracker.models.user import User
+from bustracker.models.user_school import UserSchool
+
+
+"""
+Compares latency of the OAuth callback identity gate lookups:
+  OLD: sub lookup, email fallback, active school count (up to 3 round-trips)
+  NEW: single statement
+
+Read-only, every iteration is rolled back.
+
+python -m scripts.bench.bench_auth_gate --email someone@district.org --sub 1234
+
+python -m scripts.bench.bench_auth_gate --email someone@district.org --sub 1234 \
+    --iterations 500
+"""
+
+def _get_active_school_count(db, user_id):
+    stmt = (
+        select(func.count())
+        .select_from(UserSchool)
+        .join(School, School.id == UserSchool.school_id)
+        .where(UserSchool.user_id == user_id)
+        .where(School.is_active == True)
+    )
+    return int(db.execute(stmt).scalar() or 0)
+
+
+# The sequential lookups _lookup_user_for_gate() replaced, kept here only as
+# the baseline to compare against
+def _lookup_user_for_gate_OLD(db, sub, email):
+    # 1) Try by sub first
+    stmt = select(User).where(User.google_sub == sub)
+    user = db.execute(stmt).scalar_one_or_none()
+
+    found_by = 'sub' if user is not None else None
+
+    # 2) Fallback: try by email
+    if user is None:
+        stmt = select(User).where(func.lower(User.email) == email)
+        user = db.execute(stmt).scalar_one_or_none()
+        found_by = 'email' if user is not None else None
+
+    if user is None or not bool(user.is_active):
+        return user, found_by, 0
+
+    return user, found_by, _get_active_school_count(db, user.id)
+
+
+def _get_cfg():
+    load_dotenv()
+
+    env = os.getenv('FLASK_ENV', 'development').lower()
+    if env == 'production':
+        return ProdConfig()
+    return DevConfig()
+
+
+def _get_arg(argv, name, default=None):
+    if name not in argv:
+        if default is None:
+            raise ValueError(name + ' is required')
+        return default
+
+    i = argv.index(name)
+    if i == len(argv) - 1:
+        raise ValueError(name + ' requires a value')
+    return argv[i + 1]
+
+
+def _time_lookup(Session, lookup_fn, sub, email, iterations):
+    timings_ms = []
+    result = None
+
+    for _ in range(iterations):
+        session = Session()
+        try:
+            t0 = time.perf_counter()
+            user, found_by, active_school_count = lookup_fn(session, sub, email)
+            timings_ms.append((time.perf_counter() - t0) * 1000.0)
+
+            user_id = None if user is None else user.id
+            result = (user_id, found_by, active_school_count)
+        finally:
+            session.rollback()
+            session.close()
+
+    return timings_ms, result
+
+
+def _summarize(label, timings_ms):
+    ordered = sorted(timings_ms)
+    p95 = ordered[max(int(len(ordered) * 0.95) - 1, 0)]
+
+    print('%s: n=%s mean=%.3fms p50=%.3fms p95=%.3fms max=%.3fms' % (
+        label,
+        len(ordered),
+        statistics.mean(ordered),
+        statistics.median(ordered),
+        p95,
+        ordered[-1],
+    ))
+
+
+def main():
+    email = _norm_email(_get_arg(sys.argv, '--email'))
+    sub = str(_get_arg(sys.argv, '--sub')).strip()
+    iterations = int(_get_arg(sys.argv, '--iterations', default='200'))
+
+    cfg = _get_cfg()
+
+    engine = create_engine(cfg.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+    # Warm up the pool and statement caches so the first run is not penalized
+    _time_lookup(Session, _lookup_user_for_gate_OLD, sub, email, 5)
+    _time_lookup(Session, _lookup_user_for_gate, sub, email, 5)
+
+    old_ms, old_result = _time_lookup(
+        Session,
+        _lookup_user_for_gate_OLD,
+        sub,
+        email,
+        iterations,
+    )
+    new_ms, new_result = _time_lookup(
+        Session,
+        _lookup_user_for_gate,
+        sub,
+        email,
+        iterations,
+    )
+
+    _summarize('OLD (sequential)', old_ms)
+    _summarize('NEW (single statement)', new_ms)
+
+    # The OLD path skips the school count for missing/inactive users, so only
+    # compare it when the gate actually gets that far
+    if old_result[:2] != new_result[:2]:
+        print('WARNING: results differ, OLD=%s NEW=%s' % (old_result, new_result))
+    elif old_result[2] != 0 and old_result != new_result:
+        print('WARNING: results differ, OLD=%s NEW=%s' % (old_result, new_result))
+    else:
+        print('Results match: user_id=%s found_by=%s active_schools=%s' % (
+            new_result[0],
+            new_result[1],
+            new_result[2],
+        ))
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except Exception as e:
+        print('bench failed: %s' % str(e))
+        sys.exit(1)
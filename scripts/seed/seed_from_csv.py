@@ -12,12 +12,18 @@ from sqlalchemy.orm import sessionmaker
 
 # 3) app
 import bustracker.models
+from bustracker.cache import (
+    MEMBERSHIP_VERSION,
+    REFERENCE_DATA_VERSION,
+    bump_cache_version,
+)
 from bustracker.config import DevConfig, ProdConfig
 from bustracker.models.bus import Bus
 from bustracker.models.run_type import RunType
 from bustracker.models.school import School
 from bustracker.models.school_bus import SchoolBus
 from bustracker.models.school_bus_run_type import SchoolBusRunType
+from bustracker.models.status_type import StatusType
 from bustracker.models.user import User
 from bustracker.models.user_school import UserSchool
 
@@ -40,6 +46,11 @@ python -m scripts.seed.seed_from_csv
 
 python -m scripts.seed.seed_from_csv --only run_types,school_bus_run_types
 
+python -m scripts.seed.seed_from_csv --only status_types
+
+python -m scripts.seed.seed_from_csv --only user_schools --prune
+    (also removes school access for links missing from user_schools.csv)
+
 SQL commands to help with testing:
 
 SET FOREIGN_KEY_CHECKS = 0;
@@ -71,10 +82,13 @@ def _parse_only_arg(argv):
         'school_buses',
         'run_types',
         'school_bus_run_types',
+        'status_types',
         'users',
         'user_schools',
     }
 
+    # status_types is opt-in: a migration creates the ones the app needs, the
+    # CSV only adds or restyles them
     if '--only' not in argv:
         return [
             'schools',
@@ -89,7 +103,8 @@ def _parse_only_arg(argv):
     i = argv.index('--only')
     if i == len(argv) - 1:
         msg = '--only requires a value (schools, buses, school_buses, '
-        msg += 'run_types, school_bus_run_types, users, user_schools)'
+        msg += 'run_types, school_bus_run_types, status_types, users, '
+        msg += 'user_schools)'
         raise ValueError(msg)
 
     raw = argv[i + 1]
@@ -256,6 +271,10 @@ def upsert_schools(session, csv_path):
         if changed:
             updated += 1
 
+    # Cached allowed-school rows carry school names and depend on is_active
+    if inserted > 0 or updated > 0:
+        bump_cache_version(session, MEMBERSHIP_VERSION)
+
     return {'inserted': inserted, 'updated': updated, 'rows': len(rows)}
 
 
@@ -272,7 +291,7 @@ def upsert_users(session, csv_path):
         email = email.lower()
 
         existing = session.execute(
-            select(User).where(User.email == email),
+            select(User).where(User.email_normalized == email),
         ).scalar_one_or_none()
 
         if existing is None:
@@ -296,13 +315,17 @@ def upsert_users(session, csv_path):
     return {'inserted': inserted, 'updated': updated, 'rows': len(rows)}
 
 
-def upsert_user_schools(session, csv_path):
+def _read_user_school_pairs(session, csv_path):
+    """
+    Returns: (rows, [(user_id, school_id), ...]) with duplicate pairs dropped
+    """
     rows = _read_csv_rows(
         csv_path,
         required_headers=['user_email', 'school_short_name'],
     )
 
-    inserted = 0
+    pairs = []
+    seen = set()
 
     for r in rows:
         user_email = _require_str(
@@ -319,7 +342,7 @@ def upsert_user_schools(session, csv_path):
         user_email = user_email.lower()
 
         user = session.execute(
-            select(User).where(User.email == user_email),
+            select(User).where(User.email_normalized == user_email),
         ).scalar_one_or_none()
 
         if user is None:
@@ -337,24 +360,62 @@ def upsert_user_schools(session, csv_path):
             )
             raise ValueError(msg)
 
-        existing = session.execute(
-            select(UserSchool).where(
-                UserSchool.user_id == user.id,
-                UserSchool.school_id == school.id,
-            ),
-        ).scalar_one_or_none()
+        pair = (user.id, school.id)
+        if pair not in seen:
+            seen.add(pair)
+            pairs.append(pair)
 
-        if existing is None:
+    return rows, pairs
+
+
+def _get_user_school_links(session):
+    links = session.execute(select(UserSchool)).scalars().all()
+    return {(l.user_id, l.school_id): l for l in links}
+
+
+def upsert_user_schools(session, csv_path):
+    rows, pairs = _read_user_school_pairs(session, csv_path)
+    existing_by_pair = _get_user_school_links(session)
+
+    inserted = 0
+
+    for user_id, school_id in pairs:
+        if (user_id, school_id) not in existing_by_pair:
             link = UserSchool(
-                user_id=user.id,
-                school_id=school.id,
+                user_id=user_id,
+                school_id=school_id,
             )
             session.add(link)
             inserted += 1
 
+    if inserted > 0:
+        bump_cache_version(session, MEMBERSHIP_VERSION)
+
     return {'inserted': inserted, 'rows': len(rows)}
 
 
+def prune_user_schools(session, csv_path):
+    """
+    Delete every user_schools link that is not in user_schools.csv, revoking
+    that school for that user. Only runs with --prune.
+    """
+    rows, pairs = _read_user_school_pairs(session, csv_path)
+    existing_by_pair = _get_user_school_links(session)
+
+    wanted_pairs = set(pairs)
+    deleted = 0
+
+    for pair, link in existing_by_pair.items():
+        if pair not in wanted_pairs:
+            session.delete(link)
+            deleted += 1
+
+    if deleted > 0:
+        bump_cache_version(session, MEMBERSHIP_VERSION)
+
+    return {'deleted': deleted, 'rows': len(rows)}
+
+
 def upsert_buses(session, csv_path):
     rows = _read_csv_rows(
         csv_path,
@@ -625,6 +686,92 @@ def upsert_run_types(session, csv_path):
     return {'inserted': inserted, 'updated': updated, 'rows': len(rows)}
 
 
+def upsert_status_types(session, csv_path):
+    rows = _read_csv_rows(
+        csv_path,
+        required_headers=[
+            'status_type_code',
+            'display_name',
+            'color_name',
+            'hex_color',
+            'is_active',
+        ],
+    )
+
+    existing_by_code = {
+        st.status_type_code: st
+        for st in session.execute(select(StatusType)).scalars().all()
+    }
+
+    inserted = 0
+    updated = 0
+
+    for r in rows:
+        status_type_code = _require_str(
+            r.get('status_type_code'),
+            'status_types.csv',
+            'status_type_code',
+        )
+        display_name = _require_str(
+            r.get('display_name'),
+            'status_types.csv',
+            'display_name',
+        )
+        color_name = _require_str(
+            r.get('color_name'),
+            'status_types.csv',
+            'color_name',
+        )
+        hex_color = _require_str(
+            r.get('hex_color'),
+            'status_types.csv',
+            'hex_color',
+        )
+        _validate_hex_color(hex_color, 'status_types.csv')
+        is_active = _parse_bool_0_1(
+            r.get('is_active'),
+            'status_types.csv',
+        )
+
+        existing = existing_by_code.get(status_type_code)
+
+        if existing is None:
+            st = StatusType(
+                status_type_code=status_type_code,
+                display_name=display_name,
+                color_name=color_name,
+                hex_color=hex_color,
+                is_active=is_active,
+            )
+            session.add(st)
+            existing_by_code[status_type_code] = st
+            inserted += 1
+            continue
+
+        changed = False
+
+        if existing.display_name != display_name:
+            existing.display_name = display_name
+            changed = True
+
+        if existing.color_name != color_name:
+            existing.color_name = color_name
+            changed = True
+
+        if existing.hex_color != hex_color:
+            existing.hex_color = hex_color
+            changed = True
+
+        if existing.is_active != is_active:
+            existing.is_active = is_active
+            changed = True
+
+        if changed:
+            updated += 1
+
+    return {'inserted': inserted, 'updated': updated, 'rows': len(rows)}
+
+
 def upsert_school_bus_run_types(session, csv_path):
     rows = _read_csv_rows(
         csv_path,
@@ -806,6 +953,10 @@ def upsert_school_bus_run_types_OLD(session, csv_path):
 def main():
     only = _parse_only_arg(sys.argv)
 
+    prune = '--prune' in sys.argv
+    if prune and 'user_schools' not in only:
+        raise ValueError('--prune only applies to user_schools')
+
     repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
     seed_data_dir = os.path.join(repo_root, 'scripts', 'seed', 'data')
 
@@ -816,6 +967,7 @@ def main():
     school_buses_csv = os.path.join(seed_data_dir, 'school_buses.csv')
     run_types_csv = os.path.join(seed_data_dir, 'run_types.csv')
     school_bus_run_types_csv = os.path.join(seed_data_dir, 'school_bus_run_types.csv')
+    status_types_csv = os.path.join(seed_data_dir, 'status_types.csv')
 
     cfg = _get_cfg()
 
@@ -830,8 +982,10 @@ def main():
         school_buses_result = None
         run_types_result = None
         school_bus_run_types_result = None
+        status_types_result = None
         users_result = None
         user_schools_result = None
+        pruned_user_schools_result = None
 
         if 'schools' in only:
             schools_result = upsert_schools(session, schools_csv)
@@ -857,14 +1011,39 @@ def main():
                 school_bus_run_types_csv,
             )
 
+        if 'status_types' in only:
+            status_types_result = upsert_status_types(
+                session,
+                status_types_csv,
+            )
+
         if 'users' in only:
             users_result = upsert_users(session, users_csv)
 
         if 'user_schools' in only:
             user_schools_result = upsert_user_schools(session, user_schools_csv)
 
+        if prune:
+            pruned_user_schools_result = prune_user_schools(
+                session,
+                user_schools_csv,
+            )
+
         session.commit()
 
+        # Separate transaction after the data is committed: a worker that
+        # sees the new version is guaranteed to load the new rows
+        reference_tables = (
+            'buses',
+            'school_buses',
+            'run_types',
+            'school_bus_run_types',
+            'status_types',
+        )
+        if any(t in only for t in reference_tables):
+            bump_cache_version(session, REFERENCE_DATA_VERSION)
+            session.commit()
+
     except Exception:
         session.rollback()
         raise
@@ -908,6 +1087,13 @@ def main():
             school_bus_run_types_result['rows'],
         ))
 
+    if status_types_result is not None:
+        print('StatusTypes: inserted=%s updated=%s rows=%s' % (
+            status_types_result['inserted'],
+            status_types_result['updated'],
+            status_types_result['rows'],
+        ))
+
     if users_result is not None:
         print('Users: inserted=%s updated=%s rows=%s' % (
             users_result['inserted'],
@@ -921,6 +1107,12 @@ def main():
             user_schools_result['rows'],
         ))
 
+    if pruned_user_schools_result is not None:
+        print('UserSchools pruned: deleted=%s rows=%s' % (
+            pruned_user_schools_result['deleted'],
+            pruned_user_schools_result['rows'],
+        ))
+
 
 if __name__ == '__main__':
     try: